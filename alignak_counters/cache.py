@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides a local on-disk cache of the backend responses
+
+Each response is stored in its own JSON file, named after a hash of the backend URL, the
+endpoint and the normalized request parameters (page included). A response older than the
+cache time to live is not used anymore. The file modification time is the date the response
+was fetched and its access time is explicitly updated when it is used, so that the least
+recently used responses are removed first when the cache exceeds its maximum size.
+
+The responses of an extraction without an end date, or ending within the cache time to
+live, may miss the logs checked since they were cached: the extractor only uses the cache
+for the time windows which ended before, see CounterExtractor.use_cache.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger('alignak-backend-counters')
+
+
+def normalize_params(params):
+    """
+    Normalize the request parameters, so that equivalent requests have the same key
+
+    The JSON encoded parameters (where, projection) are decoded, so that their keys order
+    does not matter.
+
+    :param params: request parameters
+    :return: normalized parameters
+    :rtype: dict
+    """
+    normalized = {}
+    for key, value in (params or {}).items():
+        if isinstance(value, basestring) and value[:1] in ('{', '['):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        normalized[key] = value
+    return normalized
+
+
+class PageCache(object):
+    """
+    On-disk cache of the backend responses
+
+    :param directory: cache directory, created when the first response is stored
+    :param ttl: time to live of the cached responses, in seconds
+    :param max_size: maximum size of the cache, in bytes
+    :param refresh: do not use the cached responses, only store the new ones
+    """
+
+    def __init__(self, directory, ttl=600, max_size=100 * 1024 * 1024, refresh=False):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        # Set when the cache directory cannot be created, the responses are not cached
+        self.disabled = False
+
+    def get_key(self, url, endpoint, params):
+        """
+        Get the cache key of a request
+
+        :return: hexadecimal hash
+        """
+        request = json.dumps([url, endpoint, normalize_params(params)], sort_keys=True)
+        return hashlib.sha1(request.encode('utf-8')).hexdigest()
+
+    def get_filename(self, key):
+        """
+        Get the file of a cached response
+        """
+        return os.path.join(self.directory, "%s.json" % key)
+
+    def get(self, key):
+        """
+        Get a cached response
+
+        :param key: request key
+        :return: response, or None if the response is not cached or expired
+        """
+        response = None
+        if not self.refresh and not self.disabled:
+            filename = self.get_filename(key)
+            try:
+                fetched = os.path.getmtime(filename)
+                if time.time() - fetched <= self.ttl:
+                    with open(filename) as cache_file:
+                        response = json.load(cache_file)
+                    # The access time orders the responses for the eviction
+                    os.utime(filename, (time.time(), fetched))
+            except (IOError, OSError, ValueError):
+                response = None
+
+        with self.lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response
+
+    def set(self, key, response):
+        """
+        Store a response in the cache
+
+        The response is written to a temporary file renamed afterwards, so that concurrent
+        runs never read a truncated response. The cache directory is created when the first
+        response is stored; if it cannot be created, a warning is logged and the responses
+        are not cached anymore.
+
+        :param key: request key
+        :param response: backend response
+        :return: None
+        """
+        if self.disabled or not self.make_directory():
+            return
+        filename = self.get_filename(key)
+        temp_filename = "%s.%d.%d.tmp" % (filename, os.getpid(), threading.current_thread().ident)
+        try:
+            with open(temp_filename, 'w') as cache_file:
+                json.dump(response, cache_file)
+            os.rename(temp_filename, filename)
+        except (IOError, OSError) as exp:
+            logger.warning("Response cannot be cached: %s", exp)
+
+    def make_directory(self):
+        """
+        Create the cache directory if it does not exist
+
+        :return: True if the directory exists, else False and the cache is disabled
+        """
+        with self.lock:
+            if self.disabled:
+                return False
+            if os.path.isdir(self.directory):
+                return True
+            try:
+                os.makedirs(self.directory)
+            except OSError as exp:
+                if not os.path.isdir(self.directory):
+                    logger.warning("Cache directory %s cannot be created, the backend "
+                                   "responses are not cached: %s", self.directory, exp)
+                    self.disabled = True
+                    return False
+        return True
+
+    def prune(self):
+        """
+        Remove the expired responses, then the least recently used ones until the cache
+        size is below its maximum size
+
+        :return: number of removed responses
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+        now = time.time()
+        entries = []
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            filename = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(filename)
+                if now - stat.st_mtime > self.ttl:
+                    os.remove(filename)
+                    removed += 1
+                    continue
+            except OSError:
+                continue
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, filename))
+
+        size = sum(entry[1] for entry in entries)
+        for _, file_size, filename in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(filename)
+                removed += 1
+            except OSError:
+                pass
+            size -= file_size
+
+        logger.debug("Cache pruned: %d responses removed, %d bytes used", removed, size)
+        return removed
+
+
+class CachedBackend(object):
+    """
+    Backend client wrapper which serves the get requests from a PageCache
+
+    The other attributes are the ones of the wrapped backend client.
+    """
+
+    def __init__(self, backend, cache):
+        self.backend = backend
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def get(self, endpoint, params=None):
+        """
+        Get the items of an endpoint, from the cache if possible
+
+        :param endpoint: endpoint relative to the backend root URL
+        :param params: parameters for the backend API
+        :return: decoded response
+        :rtype: dict
+        """
+        key = self.cache.get_key(self.backend.url_endpoint_root, endpoint, params)
+        response = self.cache.get(key)
+        if response is None:
+            response = self.backend.get(endpoint, params=params)
+            self.cache.set(key, response)
+        return response
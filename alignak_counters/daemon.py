@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides the exporter daemon
+
+The daemon keeps its backend session, its parsed performance data cache and its
+incremental extraction state in memory. It polls the check result logs checked since its
+previous poll every interval, and pushes the new samples to a sink by batches.
+
+The batches are queued in a bounded queue and written by a sender thread. When the sink is
+slow or down, the sender retries with a growing delay, the queue fills up and the polling
+waits for it: the backend is not polled faster than the sink accepts the samples. The state
+is only saved once all the samples of a poll are written, so that a stopped daemon polls
+them again when it is restarted, and it is restored when a poll fails, so that the poll is
+tried again from the same point: some samples may be written twice, none is lost.
+
+The counters rates are computed from the last samples of the previous poll, kept in the
+state. The samples cannot be aggregated: the buckets of a poll are still in progress.
+"""
+import time
+import threading
+import logging
+
+try:
+    from Queue import Queue, Full, Empty
+except ImportError:  # pragma: no cover, Python 3
+    from queue import Queue, Full, Empty
+
+from alignak_counters.sinks import SinkError
+from alignak_counters.state import ExtractionState
+
+logger = logging.getLogger('alignak-backend-counters')
+
+
+class CounterDaemon(object):
+    # pylint: disable=too-many-instance-attributes
+    """
+    Poll the new counters samples and push them to a sink
+
+    :param extractor: CounterExtractor object, its session is kept between the polls
+    :param sink: Sink object
+    :param parameters: extraction parameters, see CounterExtractor.configure
+    :param interval: polling interval, in seconds
+    :param batch_size: number of samples written to the sink at once
+    :param queue_size: number of batches waiting to be written
+    :param retry_delay: first delay before writing again a batch, doubled on each failure
+    :param max_retry_delay: maximum delay before writing again a batch
+    :raise ValueError: if the parameters request an aggregation
+    """
+
+    def __init__(self, extractor, sink, parameters=None, interval=60, batch_size=1000,
+                 queue_size=10, retry_delay=1, max_retry_delay=60):
+        # pylint: disable=too-many-arguments
+        self.extractor = extractor
+        self.sink = sink
+        self.parameters = dict(parameters or {})
+        if self.parameters.get('aggregate'):
+            raise ValueError("The daemon cannot aggregate the counters.")
+        self.interval = interval
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        # The samples extracted since the saved state are only sent once
+        self.state = self.parameters.pop('state', None) or ExtractionState()
+        self.since = self.parameters.pop('since', None)
+
+        self.queue = Queue(maxsize=queue_size)
+        self.stopped = threading.Event()
+        self.sender = None
+        self.polls = 0
+
+    def stop(self, *args):  # pylint: disable=unused-argument
+        """
+        Stop the daemon, may be used as a signal handler
+
+        :return: None
+        """
+        logger.info("Stopping the daemon...")
+        self.stopped.set()
+
+    def send(self):
+        """
+        Write the queued batches to the sink, until the daemon is stopped
+
+        A batch is written again until it succeeds.
+
+        :return: None
+        """
+        while not self.stopped.is_set():
+            try:
+                batch = self.queue.get(timeout=1)
+            except Empty:
+                continue
+            delay = self.retry_delay
+            while not self.stopped.is_set():
+                try:
+                    with self.extractor.stats.timer('sink_write'):
+                        self.sink.write(batch)
+                    self.extractor.stats.incr('sink_samples', len(batch))
+                    break
+                except SinkError as exp:
+                    logger.warning("%s, retrying in %d seconds", exp, delay)
+                    self.extractor.stats.incr('sink_errors')
+                    self.stopped.wait(delay)
+                    delay = min(delay * 2, self.max_retry_delay)
+            self.queue.task_done()
+
+    def push(self, batch):
+        """
+        Queue a batch of samples, waiting while the queue is full
+
+        :return: True if the batch is queued, False if the daemon was stopped
+        """
+        waited = False
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(batch, timeout=1)
+                return True
+            except Full:
+                if not waited:
+                    logger.warning("The sink is late, waiting before polling again")
+                    waited = True
+                self.extractor.stats.incr('sink_queue_full')
+        return False
+
+    def wait_sent(self):
+        """
+        Wait until all the queued batches are written
+
+        :return: True if they are written, False if the daemon was stopped
+        """
+        while self.queue.unfinished_tasks:
+            if self.stopped.wait(0.1):
+                return False
+        return True
+
+    def poll(self, since):
+        """
+        Extract the samples checked since a date, and queue them
+
+        :param since: timestamp, None for all the available samples
+        :return: number of samples queued, None if the daemon was stopped
+        """
+        parameters = dict(self.parameters, since=since, state=self.state)
+        batch = []
+        count = 0
+        for sample in self.extractor.extract(**parameters):
+            batch.append(sample)
+            if len(batch) >= self.batch_size:
+                if not self.push(batch):
+                    return None
+                count += len(batch)
+                batch = []
+        if batch:
+            if not self.push(batch):
+                return None
+            count += len(batch)
+        return count
+
+    def run(self):
+        """
+        Poll and push the samples every interval, until the daemon is stopped
+
+        The first poll extracts the samples checked since the since parameter, or since one
+        interval before the daemon start. The next ones extract the samples checked since
+        one interval before the previous poll, the state filtering the ones already sent.
+
+        :return: None
+        """
+        self.sender = threading.Thread(target=self.send, name='sink-sender')
+        self.sender.daemon = True
+        self.sender.start()
+
+        since = self.since
+        if since is None and self.state.lower_bound() is None:
+            since = int(time.time()) - self.interval
+        try:
+            while not self.stopped.is_set():
+                start = time.time()
+                snapshot = self.state.snapshot()
+                try:
+                    count = self.poll(since)
+                except Exception as exp:  # pylint: disable=broad-except
+                    # The backend may be unavailable, the same poll is tried again, from the
+                    # state before the samples it already extracted but did not queue
+                    self.state.restore(snapshot)
+                    logger.error("Poll failed, trying again in %d seconds: %s",
+                                 self.interval, exp)
+                    self.extractor.stats.incr('poll_errors')
+                else:
+                    if count is None or not self.wait_sent():
+                        break
+                    self.state.save()
+                    self.polls += 1
+                    logger.info("Poll %d: %d samples pushed in %.3f seconds",
+                                self.polls, count, time.time() - start)
+
+                    # Overlap the previous poll, the logs may be posted after their check
+                    if self.since is None or start - self.interval > self.since:
+                        since = int(start) - self.interval
+                self.stopped.wait(max(0, self.interval - (time.time() - start)))
+        finally:
+            self.stopped.set()
+            self.sender.join()
+            self.sink.close()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides the dates handling functions
+
+The time zones are resolved once per DateFormatter, which also caches the formatted dates,
+so that formatting the date of many check results costs few.
+"""
+from __future__ import print_function
+
+import time
+from calendar import timegm
+from datetime import datetime
+
+# Formatted dates cached per DateFormatter
+DATES_CACHE_SIZE = 4096
+
+
+def get_ts_date(param_date, date_format):
+    """
+        Get date as a timestamp
+    """
+    if isinstance(param_date, (int, long, float)):
+        # Date is received as a float or integer, store as a timestamp ...
+        # ... and assume it is UTC
+        # ----------------------------------------------------------------
+        return param_date
+    elif isinstance(param_date, basestring):
+        try:
+            # Date is supposed to be received as string formatted date
+            timestamp = timegm(time.strptime(param_date, date_format))
+            return timestamp
+        except ValueError:
+            print(
+                " parameter: '%s' is not a valid string format: '%s'",
+                param_date, date_format
+            )
+    else:
+        try:
+            # Date is supposed to be received as a struct time ...
+            # ... and assume it is local time!
+            # ----------------------------------------------------
+            timestamp = timegm(param_date.timetuple())
+            return timestamp
+        except TypeError:  # pragma: no cover, simple protection
+            print(
+                " parameter: %s is not a valid time tuple", param_date
+            )
+    return None
+
+
+def get_date_parameter(param_date, date_format):
+    """
+    Get a command line date parameter as a timestamp
+
+    The date is either a timestamp or a string formatted according to `date_format`
+
+    :param param_date: command line parameter value
+    :param date_format: date string format
+    :return: timestamp, or None if the date is not valid
+    """
+    try:
+        return int(float(param_date))
+    except ValueError:
+        return get_ts_date(param_date, date_format)
+
+
+class DateFormatter(object):  # pylint: disable=too-few-public-methods
+    """
+    Format timestamps as dates of a time zone
+    """
+
+    def __init__(self, timezone='Europe/Paris', fmt='%Y-%m-%d %H:%M:%S'):
+        from dateutil import tz
+
+        self.timezone = tz.gettz(timezone)
+        if self.timezone is None:
+            raise ValueError("Unknown time zone: %s" % timezone)
+        self.fmt = fmt
+        self.cache = {}
+
+    def format(self, timestamp):
+        """
+        Format a timestamp as a string according to the formatter format
+
+        If the formatter has no format, the date is formatted as ISO 8601.
+
+        :param timestamp: UTC timestamp
+        :type timestamp: float
+        :return: formatted date
+        """
+        try:
+            return self.cache[timestamp]
+        except KeyError:
+            pass
+
+        _date = datetime.fromtimestamp(timestamp, self.timezone)
+        if self.fmt:
+            formatted = _date.strftime(self.fmt)
+        else:
+            formatted = _date.isoformat(' ')
+
+        if len(self.cache) >= DATES_CACHE_SIZE:
+            self.cache.clear()
+        self.cache[timestamp] = formatted
+        return formatted
+
+
+# Formatters used by get_iso_date, per (time zone, format)
+_formatters = {}
+
+
+def get_iso_date(param_date, fmt='%Y-%m-%d %H:%M:%S', timezone='Europe/Paris'):
+    """
+    Format the provided `_date` as a string according to the specified format.
+
+    If no date format is specified, the date is formatted as ISO 8601.
+
+    :type param_date: float
+    """
+    formatter = _formatters.get((timezone, fmt))
+    if formatter is None:
+        formatter = _formatters[(timezone, fmt)] = DateFormatter(timezone, fmt)
+    return formatter.format(param_date)
@@ -0,0 +1,678 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides the counters extractor, to be used as a library::
+
+    extractor = CounterExtractor('http://127.0.0.1:5000', 'admin', 'admin')
+    for host, service, metric, timestamp, value, _ in extractor.extract(
+            hosts='localhost', services='load', metrics='load1', since=1464739200):
+        ...
+
+The extractor logs in the backend once and its session is used by all its extractions. An
+extractor runs one extraction at a time: several extractors may share the same backend
+client to run concurrent extractions.
+"""
+import time
+import json
+import logging
+
+from alignak_counters.cache import CachedBackend
+from alignak_counters.dates import DateFormatter
+from alignak_counters.pagination import BackendPages
+from alignak_counters.perfdata import PerfDatasCache
+from alignak_counters.processing import AGGREGATES, StreamAggregator, aggregate_counters
+from alignak_counters.processing import StreamDeriver, derive_counters, seed_counters
+from alignak_counters.series import Counters
+from alignak_counters.stats import Stats
+from alignak_counters.summary import DEFAULT_ACCURACY, StreamSummarizer
+from alignak_counters.targets import NameFilter, get_batches, resolve_names
+
+logger = logging.getLogger('alignak-backend-counters')
+# The application using the extractor configures the logs
+logger.addHandler(logging.NullHandler())
+
+
+class ExtractionError(Exception):
+    """
+    Error raised when an extraction cannot be run
+    """
+    pass
+
+
+def split_names(names):
+    """
+    Get a list of names
+
+    :param names: list of names, or comma separated string of names
+    :return: list
+    """
+    if isinstance(names, basestring):
+        return names.split(',')
+    return list(names)
+
+
+class CounterExtractor(object):
+    # pylint: disable=too-many-instance-attributes
+    """
+    Counters extraction from the performance data of the backend check result logs
+
+    :param backend: backend URL, or a backend client which is already logged in
+    :param username: backend login username
+    :param password: backend login password
+    :param workers: number of pages fetched concurrently
+    :param page_size: number of items requested per page
+    :param batch_size: number of hosts, and of services, searched per backend query
+    :param cache: PageCache of the backend responses, None to not cache them
+    :param parse_cache: number of parsed performance data strings kept in cache
+    :param parse_workers: number of processes parsing the performance data
+    :param timezone: time zone of the dates displayed in the logs
+    :raise ValueError: if the time zone is not known
+    """
+
+    def __init__(self, backend, username='admin', password='admin', workers=4, page_size=500,
+                 batch_size=50, cache=None, parse_cache=1024,
+                 parse_workers=1, timezone='Europe/Paris'):
+        # pylint: disable=too-many-arguments
+        # Backend client, logged in on the first extraction if only its URL is known
+        if isinstance(backend, basestring):
+            self.backend = None
+            self.backend_url = backend
+        else:
+            self.backend = backend
+            self.backend_url = getattr(backend, 'url_endpoint_root', None)
+            if cache is not None:
+                self.backend = CachedBackend(backend, cache)
+        logger.debug("Backend URL: %s", self.backend_url)
+        self.username = username
+        self.password = password
+
+        # Pages fetching
+        self.workers = workers
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.cache = cache
+        logger.debug("Fetching pages of %d items with %d workers", self.page_size, self.workers)
+
+        # Performance data parsing
+        self.parse_cache = parse_cache
+        self.parse_workers = parse_workers
+        self.perfdatas = None
+
+        # Displayed dates
+        self.dates = DateFormatter(timezone)
+
+        # Instrumentation, the dropped metrics are only counted for the statistics display
+        self.stats = Stats()
+        self.show_stats = False
+
+        # Resolved targets, counters and results of the last extraction, reset by configure
+        self.hosts = self.services = None
+        self.deriver = None
+        self.result = False
+        self.counters = self.summaries = None
+        self.items_count = self.samples_count = 0
+        self.configure()
+
+    def configure(self, hosts='all', services='all', metrics='all', since=None, until=None,
+                  state=None, rate=False, aggregate=None, bucket=300):
+        # pylint: disable=too-many-arguments
+        """
+        Set the parameters of the next extractions
+
+        The hosts and services may be exact names, glob patterns or regular expressions
+        prefixed with re:, see the targets module.
+
+        :param hosts: list or comma separated string of hosts names, 'all' for all the hosts
+        :param services: list or comma separated string of services names, or 'all'
+        :param metrics: list or comma separated string of metrics names, or 'all'
+        :param since: extract the data checked since this timestamp
+        :param until: extract the data checked until this timestamp
+        :param state: ExtractionState of an incremental extraction, saved by the caller
+        :param rate: replace the counters (metrics which unit is c) with their rate
+        :param aggregate: aggregation function, one of AGGREGATES, None to not aggregate
+        :param bucket: aggregation time bucket duration, in seconds
+        :return: None
+        :raise ValueError: if a parameter is not valid
+        """
+        self.targeted_host = split_names(hosts)
+        logger.debug("Targeted hosts: %s", self.targeted_host)
+        self.targeted_service = split_names(services)
+        logger.debug("Targeted services: %s", self.targeted_service)
+        self.targeted_metrics = split_names(metrics)
+        logger.debug("Targeted counters: %s", self.targeted_metrics)
+
+        # Time window
+        if since is not None and until is not None and since > until:
+            raise ValueError("The since date must be before the until date.")
+        self.date_from = since
+        self.date_to = until
+        logger.debug("Time window: %s - %s", self.date_from, self.date_to)
+
+        # Incremental extraction
+        self.state = state
+
+        # Counters rate, computed before the aggregation
+        self.rate = rate
+        self.deriver = None
+
+        # Aggregation
+        if aggregate and aggregate not in AGGREGATES:
+            raise ValueError("Aggregation function must be one of: %s." % ', '.join(AGGREGATES))
+        if bucket <= 0:
+            raise ValueError("Aggregation bucket must be a positive integer value.")
+        if aggregate and state is not None:
+            # The last buckets of a run are not over, they would be written again
+            raise ValueError("The incremental extraction cannot aggregate the counters, its "
+                             "last time buckets are not over.")
+        self.aggregate = aggregate
+        self.bucket = bucket
+
+        # Parsed performance data cache, kept while the targeted metrics do not change
+        names = None if self.targeted_metrics == ['all'] else set(self.targeted_metrics)
+        if self.perfdatas is None or self.perfdatas.names != names:
+            self.perfdatas = PerfDatasCache(self.parse_cache, names)
+
+        # Hosts and services names resolved in the backend
+        self.hosts = self.services = None
+
+        # Fetched counters
+        self.result = False
+        self.errors_found = []
+        self.counters = Counters()
+        self.summaries = None
+        self.items_count = 0
+        self.samples_count = 0
+
+    def authenticate(self):
+        """
+        Login on backend with username and password
+
+        :return: True if the login succeeded, else False with the errors in errors_found
+        """
+        # The backend client and requests are long to import, only import them when used
+        from alignak_backend_client.client import BackendException
+        from alignak_counters.session import PooledBackend
+
+        logger.info("Authenticating to %s...", self.backend_url)
+        try:
+            # Backend authentication with token generation
+            # headers = {'Content-Type': 'application/json'}
+            # payload = {'username': self.username, 'password': self.password, 'action': 'generate'}
+            self.backend = PooledBackend(self.backend_url, connections=self.workers)
+            self.backend.login(self.username, self.password)
+            if self.cache is not None:
+                self.backend = CachedBackend(self.backend, self.cache)
+        except BackendException as e:
+            logger.error("Alignak backend error: %s", e.message)
+            self.errors_found.append("Alignak backend error: %s" % e.message)
+            self.backend = None
+            return False
+
+        if self.backend.token is None:
+            logger.error("Access is denied!")
+            self.errors_found.append("Access is denied!")
+            self.backend = None
+            return False
+
+        logger.info("Authenticated.")
+        return True
+
+    def use_cache(self):
+        """
+        Check if the backend responses cache may be used by the current extraction
+
+        The logs of a time window may still change until its end is older than the cache
+        time to live, and an incremental extraction needs the latest logs.
+
+        :return: True if the cached responses may be used
+        """
+        if self.cache is None or self.state is not None or self.date_to is None:
+            return False
+        return self.date_to < time.time() - self.cache.ttl
+
+    def get_backend(self):
+        """
+        Get the backend client of the current extraction, serving the responses from the
+        cache only if it may be used
+
+        :return: backend client
+        """
+        if self.cache is not None and not self.use_cache():
+            logger.debug("Backend responses cache not used: the extracted time window may "
+                         "have new logs")
+            return self.backend.backend
+        return self.backend
+
+    def resolve_targets(self):
+        """
+        Resolve the targeted hosts and services names in the host and service collections
+
+        :return: None
+        """
+        pages = BackendPages(self.get_backend(), workers=self.workers, page_size=self.page_size,
+                             stats=self.stats)
+        self.hosts = resolve_names(pages, 'host', NameFilter(self.targeted_host))
+        self.services = resolve_names(pages, 'service', NameFilter(self.targeted_service))
+        if self.hosts is not None:
+            logger.info("Targeted hosts: %d", len(self.hosts))
+            logger.debug("Resolved hosts: %s", self.hosts)
+        if self.services is not None:
+            logger.info("Targeted services: %d", len(self.services))
+            logger.debug("Resolved services: %s", self.services)
+
+    def get_search_params(self, hosts=None, services=None):
+        """
+        Build the backend search parameters for the targeted hosts and services
+
+        The hosts and services are searched with their exact names, so that the backend
+        uses its indexes.
+
+        :param hosts: searched hosts names, None for all the hosts
+        :param services: searched services names, None for all the services
+        :return: search parameters
+        :rtype: dict
+        """
+        # Log check results
+        params = {
+            'sort': '-last_check',
+            'projection': json.dumps(
+                {
+                    "host_name": 1, "service_name": 1,
+                    "last_check": 1, "state": 1, "state_type": 1, "perf_data": 1
+                }
+            )
+        }
+        conditions = []
+        if hosts is not None:
+            conditions.append({"host_name": {"$in": hosts}})
+        if services is not None:
+            conditions.append({"service_name": {"$in": services}})
+
+        # Time window, the backend uses its last_check index
+        last_check = {}
+        if self.date_from is not None:
+            last_check["$gte"] = self.date_from
+        if self.state is not None:
+            # Incremental extraction, oldest first to move the checkpoints forward
+            params['sort'] = 'last_check'
+            lower_bound = self.state.lower_bound(hosts, services)
+            if lower_bound is not None and \
+                    (self.date_from is None or lower_bound >= self.date_from):
+                last_check.pop("$gte", None)
+                last_check["$gt"] = lower_bound
+        if self.date_to is not None:
+            last_check["$lte"] = self.date_to
+        if last_check:
+            conditions.append({"last_check": last_check})
+        if conditions:
+            params['where'] = json.dumps({"$and": conditions})
+
+        logger.debug("Search parameters: %s", params)
+        return params
+
+    def get_queries(self):
+        """
+        Build the backend search parameters of the queries fetching the targeted check
+        result logs
+
+        The targeted hosts and services are split in batches, so that the query string
+        stays short, one query per hosts batch and services batch. All the logs of an host
+        service are fetched by the same query, in time order.
+
+        :return: list of search parameters
+        """
+        with self.stats.timer('resolve'):
+            self.resolve_targets()
+        if (self.hosts is not None and not self.hosts) or \
+                (self.services is not None and not self.services):
+            logger.warning("No host / service matching the targeted hosts and services")
+            return []
+        hosts_batches = services_batches = [None]
+        if self.hosts is not None:
+            hosts_batches = get_batches(self.hosts, self.batch_size)
+        if self.services is not None:
+            services_batches = get_batches(self.services, self.batch_size)
+        return [self.get_search_params(hosts, services)
+                for hosts in hosts_batches for services in services_batches]
+
+    def get_items(self, queries):
+        """
+        Get the check result logs matching the search parameters
+
+        For an incremental extraction, the logs that were already extracted are skipped.
+
+        :param queries: list of search parameters
+        :return: generator of lists of items, one list per backend page
+        """
+        pages = BackendPages(self.get_backend(), workers=self.workers, page_size=self.page_size,
+                             stats=self.stats)
+        waited = time.time()
+        for result in pages.get_queries_pages('logcheckresult', queries):
+            # Time spent waiting for the pages, not hidden by the concurrent requests
+            self.stats.add_time('fetch_wait', time.time() - waited)
+            items = result.get('_items')
+            if items:
+                meta = result.get('_meta', {})
+                if meta.get('page') == 1 and meta.get('total') is not None:
+                    logger.info("Found %d matching items", meta['total'])
+                self.items_count += len(items)
+
+                if self.state is not None:
+                    with self.stats.timer('filter'):
+                        count = len(items)
+                        items = [item for item in items if self.state.is_new(
+                            item['host_name'], item['service_name'], item['last_check'])]
+                        self.stats.incr('items_skipped', count - len(items))
+                yield items
+            waited = time.time()
+
+    def update_state(self, items):
+        """
+        Update the incremental extraction state with check result logs which counters are
+        extracted
+
+        :param items: check result logs
+        :return: None
+        """
+        if self.state is None:
+            return
+        for item in items:
+            self.state.update(item['host_name'], item['service_name'], item['last_check'])
+        if self.deriver is not None:
+            # The rates of the next extraction start from the last samples of the counters
+            for sample in self.deriver.pop_updated():
+                self.state.update_counter(*sample)
+
+    def parse_items(self, queries):
+        """
+        Parse the check result logs matching the search parameters in worker processes
+
+        :param queries: list of search parameters
+        :return: generator of (items, chunks) tuples, one per backend page
+        """
+        from alignak_counters.parallel import ParallelParser
+
+        parser = ParallelParser(self.parse_workers, self.perfdatas.size, self.perfdatas.names)
+        try:
+            for items, count, hits, misses, chunks in parser.parse(self.get_items(queries)):
+                self.samples_count += count
+                self.perfdatas.hits += hits
+                self.perfdatas.misses += misses
+                self.count_dropped(items, count)
+                yield items, chunks
+        finally:
+            parser.close()
+
+    def get_samples(self, items):
+        """
+        Get the targeted metrics samples from the performance data of check result logs
+
+        :param items: check result logs
+        :return: generator of (host, service, metric, last_check, value, Metric) tuples
+        """
+        # The per sample diagnostics, and their dates, cost nothing when the debug logs
+        # are disabled
+        debug = logger.isEnabledFor(logging.DEBUG)
+        count = self.samples_count
+        for item in items:
+            host, service, last_check = item['host_name'], item['service_name'], \
+                item['last_check']
+            if debug:
+                logger.debug("Parsing: %s", item)
+                date = self.dates.format(float(last_check))
+
+            try:
+                p = self.perfdatas.get(item['perf_data'])
+                # Only the targeted metrics are parsed
+                for metric in p:
+                    if debug:
+                        logger.debug("found: %s - %s = %s", date, metric.name, metric.value)
+                    self.samples_count += 1
+                    yield host, service, metric.name, last_check, metric.value, metric
+            except Exception as exp:
+                logger.exception("exception: %s", str(exp))
+        self.count_dropped(items, self.samples_count - count)
+
+    def count_dropped(self, items, count):
+        """
+        Count the metrics of check result logs which were not extracted, only to display
+        the statistics
+
+        The metrics are estimated from the number of '=' of the performance data.
+
+        :param items: check result logs
+        :param count: number of extracted metrics
+        :return: None
+        """
+        if self.show_stats:
+            self.stats.incr('metrics_dropped', sum(
+                (item.get('perf_data') or '').count('=') for item in items) - count)
+
+    def check_extraction(self, queries):
+        """
+        Check that some check result logs and metrics were found by the last extraction
+
+        :param queries: list of search parameters used for the extraction
+        :return: True / False if some counters were found
+        """
+        logger.info("Performance data cache: %d hits, %d misses",
+                    self.perfdatas.hits, self.perfdatas.misses)
+        if self.cache is not None:
+            logger.info("Backend responses cache: %d hits, %d misses",
+                        self.cache.hits, self.cache.misses)
+            self.cache.prune()
+
+        if self.state is not None and not self.samples_count:
+            # Incremental extraction, nothing new since the last run
+            logger.info("No new counters since the last extraction")
+            return True
+
+        if not self.items_count:
+            logger.error("No check result log matching the search query: %s", queries)
+            self.errors_found.append("No log matching the search query: %s" % queries)
+            return False
+
+        logger.info("Parsed %d items", self.items_count)
+        if not self.samples_count:
+            logger.error("No performance data metrics matching the searched counters")
+            self.errors_found.append("No performance data metrics matching the searched counters")
+            return False
+
+        return True
+
+    def get_counters(self):
+        """
+        Search required counters in the backend performance data, with the current
+        parameters, and store them in counters
+
+        :return: True / False if some counters were found
+        """
+        queries = self.get_queries()
+        self.items_count = self.samples_count = 0
+        if self.parse_workers > 1:
+            for items, chunks in self.parse_items(queries):
+                with self.stats.timer('parse'):
+                    for host, service, name, series in chunks:
+                        self.counters.add_series(host, service, name, series)
+                self.update_state(items)
+        else:
+            for items in self.get_items(queries):
+                with self.stats.timer('parse'):
+                    for host, service, name, last_check, value, metric in \
+                            self.get_samples(items):
+                        self.counters.add(host, service, name, last_check, value,
+                                          metric.uom, metric.max)
+                self.update_state(items)
+
+        self.result = self.check_extraction(queries)
+        if not self.result:
+            return False
+
+        with self.stats.timer('processing'):
+            if self.rate:
+                if self.state is not None:
+                    seed_counters(self.counters, self.state)
+                self.counters = derive_counters(self.counters)
+            if self.aggregate:
+                self.counters = aggregate_counters(self.counters, self.aggregate, self.bucket)
+
+        logger.info("Got %d counters", len(self.counters))
+        return True
+
+    def get_summaries(self, accuracy=DEFAULT_ACCURACY):
+        """
+        Summarize the counters found in the backend performance data, with the current
+        parameters, without storing their samples
+
+        :param accuracy: relative accuracy of the percentiles
+        :return: True / False if some counters were found, summarized in summaries
+        """
+        queries = self.get_queries()
+        self.summaries = StreamSummarizer(accuracy)
+        for items, samples in self.iter_pages(queries):
+            # The samples are parsed and processed while they are summarized
+            with self.stats.timer('parse_summary'):
+                self.summaries.process(samples)
+            self.update_state(items)
+
+        self.result = self.check_extraction(queries)
+        if not self.result:
+            return False
+
+        logger.info("Summarized %d counters", len(self.summaries))
+        return True
+
+    def iter_pages(self, queries):
+        """
+        Get the samples of the check result logs matching the search parameters, page after
+        page, derived and aggregated if required
+
+        The samples of a page must be consumed before the next page is requested.
+
+        :param queries: list of search parameters
+        :return: generator of (items, samples) tuples, one per backend page, the last one
+        having no items when the buckets still in progress are aggregated
+        """
+        self.items_count = self.samples_count = 0
+        deriver = aggregator = None
+        if self.rate:
+            # An incremental extraction stores the last samples of the counters in its state
+            deriver = StreamDeriver(() if self.state is None else self.state.iter_counters())
+            if self.state is not None:
+                self.deriver = deriver
+        if self.aggregate:
+            aggregator = StreamAggregator(self.aggregate, self.bucket)
+        if self.parse_workers > 1:
+            from alignak_counters.parallel import iter_chunks_samples
+
+            pages = ((items, iter_chunks_samples(chunks))
+                     for items, chunks in self.parse_items(queries))
+        else:
+            pages = ((items, self.get_samples(items)) for items in self.get_items(queries))
+        for items, samples in pages:
+            if deriver is not None:
+                samples = deriver.process(samples)
+            if aggregator is not None:
+                samples = aggregator.process(samples)
+            yield items, samples
+        if aggregator is not None:
+            yield [], aggregator.flush()
+
+    def extract(self, **parameters):
+        """
+        Extract the counters samples, as soon as they are fetched
+
+        The extractor logs in the backend on its first extraction, then its session is
+        used by the next ones. The incremental extraction state is updated, but not saved.
+        Once all the samples are consumed, result is True if some counters were found,
+        else errors_found explains why not.
+
+        :param parameters: extraction parameters, see configure
+        :return: generator of (host, service, metric, timestamp, value, Metric) samples
+        :raise ValueError: if a parameter is not valid
+        :raise ExtractionError: if the backend authentication failed
+        """
+        self.configure(**parameters)
+        if self.backend is None and not self.authenticate():
+            raise ExtractionError("; ".join(self.errors_found))
+        return self.iter_samples()
+
+    def iter_samples(self):
+        """
+        Get the counters samples, with the current parameters
+
+        :return: generator of (host, service, metric, timestamp, value, Metric) samples
+        """
+        queries = self.get_queries()
+        for items, samples in self.iter_pages(queries):
+            for sample in samples:
+                yield sample
+            self.update_state(items)
+        self.result = self.check_extraction(queries)
+
+    def stream_counters(self, writer):
+        """
+        Search required counters in the backend performance data and write them
+        to the output as soon as they are fetched
+
+        The output is flushed after each backend page, so that the memory used does not
+        depend on the extracted history length.
+
+        :param writer: streamable Writer object
+        :return: True / False if some counters were found
+        """
+        queries = self.get_queries()
+        for items, samples in self.iter_pages(queries):
+            # The samples are parsed and processed while they are written
+            with self.stats.timer('parse_output'):
+                writer.write_samples(samples)
+            self.update_state(items)
+            if self.state is not None and not self.aggregate:
+                self.state.save()
+        if self.state is not None and self.aggregate:
+            # The buckets in progress were only written at the end, so is the state
+            self.state.save()
+
+        self.result = self.check_extraction(queries)
+        if not self.result:
+            return False
+
+        logger.info("Streamed %d samples", self.samples_count)
+        return True
+
+    def collect_stats(self):
+        """
+        Collect the extraction counters in the statistics
+
+        :return: Stats object
+        """
+        self.stats.set('items', self.items_count)
+        self.stats.set('metrics', self.samples_count)
+        self.stats.set('parse_cache_hits', self.perfdatas.hits)
+        self.stats.set('parse_cache_misses', self.perfdatas.misses)
+        if self.cache is not None:
+            self.stats.set('responses_cache_hits', self.cache.hits)
+            self.stats.set('responses_cache_misses', self.cache.misses)
+        if getattr(self.backend, 'bytes_received', None) is not None:
+            self.stats.set('received_bytes', self.backend.bytes_received)
+            self.stats.add_time('json_decoding', self.backend.decoding_time)
+        return self.stats
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides the logging configuration of the command line tools
+
+The library modules only log to the alignak-backend-counters logger, they never configure
+the logging: the application does it, setup_logging being the one of the command line tools.
+"""
+import re
+import json
+import logging
+from collections import OrderedDict
+
+LOGGER_NAME = 'alignak-backend-counters'
+
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+LOG_FORMATS = ('text', 'json')
+TEXT_FORMAT = '%(asctime)s - %(levelname)8s - %(message)s'
+
+# Loggers of the backend client and of its HTTP library, which levels are set by the client
+# when it is imported
+LIBRARY_LOGGERS = ('alignak_backend_client.client', 'requests', 'urllib3')
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format the log records as JSON objects, one per line
+    """
+
+    def format(self, record):
+        entry = OrderedDict()
+        entry['time'] = self.formatTime(record)
+        entry['level'] = record.levelname
+        entry['logger'] = record.name
+        entry['message'] = record.getMessage()
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class PasswordFilter(logging.Filter):  # pylint: disable=too-few-public-methods
+    """
+    Mask the password of the login parameters logged by the backend client
+    """
+    PASSWORD = re.compile(r"""(['"]password['"]:\s*u?)(['"]).*?\2""")
+
+    def filter(self, record):
+        if record.name.startswith('alignak_backend_client'):
+            message = record.getMessage()
+            if 'password' in message:
+                record.msg = self.PASSWORD.sub(r'\1\2***\2', message)
+                record.args = None
+        return True
+
+
+def setup_logging(level='INFO', filename=None, log_format='text'):
+    """
+    Configure the logs of the counters extraction
+
+    The handlers of the root logger are replaced, so that the logs of the other libraries,
+    as the backend client, are written the same way. They are only written from their
+    warnings, unless the level is DEBUG, and never below the level: the handler filters
+    them whatever the level of their logger.
+
+    :param level: one of LOG_LEVELS
+    :param filename: log file, None to log to the standard error
+    :param log_format: one of LOG_FORMATS
+    :return: the logs handler
+    :raise IOError: if the log file cannot be opened
+    """
+    if filename:
+        handler = logging.FileHandler(filename)
+    else:
+        handler = logging.StreamHandler()
+    if log_format == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    numeric_level = getattr(logging, level)
+    handler.setLevel(numeric_level)
+    handler.addFilter(PasswordFilter())
+
+    # The backend client configures a default handler when it is imported
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(get_library_level(numeric_level))
+    logger.setLevel(numeric_level)
+    return handler
+
+
+def get_library_level(level):
+    """
+    Get the level of the other libraries logs: DEBUG, else from their warnings
+
+    :param level: numeric level of the counters extraction logs
+    :return: numeric level
+    """
+    return level if level == logging.DEBUG else max(level, logging.WARNING)
+
+
+def setup_library_logging(level='INFO'):
+    """
+    Set the level of the backend client loggers
+
+    The backend client sets the level of its loggers when it is imported, which happens
+    after setup_logging as it is only imported once the extraction starts. It is imported
+    here, so that its level is set afterwards.
+
+    :param level: one of LOG_LEVELS, the one of setup_logging
+    :return: None
+    """
+    import alignak_backend_client.client  # pylint: disable=unused-variable
+
+    library_level = get_library_level(getattr(logging, level))
+    for name in LIBRARY_LOGGERS:
+        logging.getLogger(name).setLevel(library_level)
+
+
+def log_counters(counters, count, dates):
+    """
+    Log a summary of the first extracted counters
+
+    :param counters: Counters object
+    :param count: maximum number of logged counters
+    :param dates: DateFormatter object of the logged dates
+    :return: None
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info("Extracted counters: %d", len(counters))
+    for index, (host, service, metric, series) in enumerate(counters.iter_series()):
+        if index == count:
+            logger.info("... and %d other counters", len(counters) - count)
+            break
+        if not series:
+            continue
+        logger.info("%s / %s / %s: %d samples from %s to %s", host, service, metric,
+                    len(series), dates.format(min(series.timestamps)),
+                    dates.format(max(series.timestamps)))
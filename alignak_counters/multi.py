@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides the extraction from several backends, one per site
+
+The backends are queried in parallel, each one by its own CounterExtractor in a thread, so
+that the extraction lasts as long as the slowest backend instead of the sum of all of them.
+A backend which fails does not abort the others: its errors are reported, and the counters
+of the other backends are extracted.
+
+The series of a counter found in several backends are merged by timestamp, each sample
+being tagged with its source backend.
+"""
+import time
+import heapq
+import logging
+from collections import OrderedDict
+
+try:
+    from urllib import unquote
+    from urlparse import urlparse, urlunparse
+except ImportError:  # pragma: no cover, Python 3
+    from urllib.parse import unquote, urlparse, urlunparse  # pylint: disable=ungrouped-imports
+
+from alignak_counters.series import to_json_value
+from alignak_counters.stats import Stats
+from alignak_counters.summary import DEFAULT_ACCURACY, StreamSummarizer
+
+logger = logging.getLogger('alignak-backend-counters')
+
+
+def parse_backends(backends, username='admin', password='admin'):
+    """
+    Parse a comma separated list of backends: [source=]http://[username:password@]host:port
+
+    The credentials of an URL are used instead of the default ones, their special characters
+    must be percent-encoded. The source name of a backend is its host and port, unless it
+    is named.
+
+    :param backends: backends list
+    :param username: default login username
+    :param password: default login password
+    :return: list of (source, url, username, password) tuples
+    :raise ValueError: if a backend URL is not valid, or a source is duplicated
+    """
+    result = []
+    for backend in backends.split(','):
+        source = None
+        if '=' in backend.split('://')[0]:
+            source, backend = backend.split('=', 1)
+        parsed = urlparse(backend)
+        if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+            raise ValueError("Invalid backend URL: %s" % backend)
+        netloc = parsed.netloc.rpartition('@')[2]
+        result.append((source or netloc, urlunparse(parsed._replace(netloc=netloc)),
+                       unquote(parsed.username) if parsed.username else username,
+                       unquote(parsed.password) if parsed.password else password))
+
+    sources = [source for source, _, _, _ in result]
+    for source in sources:
+        if sources.count(source) > 1:
+            raise ValueError("Backend source %s is duplicated" % source)
+    return result
+
+
+def tag_series(series, index, source):
+    """
+    Tag the samples of a series with their source
+
+    :param series: Series object, sorted
+    :param index: source index, to keep the samples of the same timestamp in sources order
+    :param source: source name
+    :return: generator of (timestamp, index, value, source) tuples
+    """
+    for timestamp, value in zip(series.timestamps, series.values):
+        yield timestamp, index, value, source
+
+
+class MultiExtractor(object):
+    """
+    Extraction from several backends in parallel
+
+    :param extractors: OrderedDict of the CounterExtractor objects of the sources
+    """
+
+    def __init__(self, extractors):
+        self.extractors = extractors
+        self.durations = OrderedDict()
+        self.results = OrderedDict()
+        self.errors_found = []
+        self.summaries = None
+
+    def extract(self, source, method):
+        """
+        Run an extraction of a source, logging in its backend if needed
+
+        :param source: source name
+        :param method: name of the CounterExtractor method running the extraction
+        :return: True / False if some counters were found
+        """
+        extractor = self.extractors[source]
+        start = time.time()
+        try:
+            with extractor.stats.timer('authenticate'):
+                authenticated = extractor.backend is not None or extractor.authenticate()
+            result = authenticated and getattr(extractor, method)()
+        except Exception as exp:  # pylint: disable=broad-except
+            # A failing backend does not abort the other ones
+            logger.error("%s extraction failed: %s", source, exp)
+            extractor.errors_found.append("Extraction failed: %s" % exp)
+            result = False
+        self.durations[source] = time.time() - start
+        return result
+
+    def run(self, method):
+        """
+        Run the extractions of all the sources in parallel
+
+        :param method: name of the CounterExtractor method running the extraction
+        :return: True if some counters were found in a backend at least
+        """
+        from multiprocessing.pool import ThreadPool
+
+        sources = list(self.extractors)
+        pool = ThreadPool(len(sources))
+        try:
+            results = pool.map(lambda source: self.extract(source, method), sources)
+        finally:
+            pool.close()
+            pool.join()
+
+        self.errors_found = []
+        for source, result in zip(sources, results):
+            self.results[source] = result
+            extractor = self.extractors[source]
+            if result:
+                logger.info("%s: extracted %d samples of %d items in %.3f seconds", source,
+                            extractor.samples_count, extractor.items_count,
+                            self.durations[source])
+            else:
+                logger.error("%s: extraction failed in %.3f seconds", source,
+                             self.durations[source])
+                self.errors_found.extend("%s: %s" % (source, error)
+                                         for error in extractor.errors_found)
+        return any(results)
+
+    def get_counters(self):
+        """
+        Extract the counters of all the backends, see CounterExtractor.get_counters
+
+        :return: True if some counters were found in a backend at least
+        """
+        return self.run('get_counters')
+
+    def get_summaries(self, accuracy=DEFAULT_ACCURACY):
+        """
+        Summarize the counters of all the backends, the summaries of a counter found in
+        several backends being merged
+
+        :param accuracy: relative accuracy of the percentiles
+        :return: True if some counters were found in a backend at least
+        """
+        result = self.run('get_summaries')
+        self.summaries = StreamSummarizer(accuracy)
+        for source, extractor in self.extractors.items():
+            if self.results[source]:
+                self.summaries.merge(extractor.summaries)
+        return result
+
+    def iter_samples(self):
+        """
+        Get the samples of the counters of all the backends, merged by timestamp
+
+        :return: generator of (host, service, metric, timestamp, value, source) samples,
+        sorted by counter and then by timestamp
+        """
+        series = {}
+        for index, (source, extractor) in enumerate(self.extractors.items()):
+            if not self.results.get(source):
+                continue
+            for host, service, metric, counter in extractor.counters.iter_series():
+                counter.sort()
+                series.setdefault((host, service, metric), []).append(
+                    tag_series(counter, index, source))
+
+        for key in sorted(series):
+            for timestamp, _, value, source in heapq.merge(*series[key]):
+                yield key + (to_json_value(timestamp), to_json_value(value), source)
+
+    def collect_stats(self):
+        """
+        Collect the statistics of all the backends, with the extraction duration and the
+        failure of each backend
+
+        :return: Stats object
+        """
+        stats = Stats()
+        for source, extractor in self.extractors.items():
+            stats.merge(extractor.collect_stats())
+        for source, duration in self.durations.items():
+            stats.add_time('extract %s' % source, duration)
+        stats.set('backends_failed', len([result for result in self.results.values()
+                                          if not result]))
+        return stats
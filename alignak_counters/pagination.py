@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides a paging engine to fetch all the items of a backend endpoint
+"""
+import logging
+import math
+from collections import deque
+
+logger = logging.getLogger('alignak-backend-counters')
+
+
+class BackendPages(object):
+    """
+    Fetch all the pages of a backend endpoint
+
+    The first page is requested alone to get the total number of matching items, then the
+    remaining pages are requested concurrently by a pool of workers. The pages are yielded
+    in order and no more than `workers` pages are fetched ahead of the consumer.
+    """
+
+    def __init__(self, backend, workers=4, page_size=500, stats=None):
+        self.backend = backend
+        self.workers = max(1, workers)
+        self.page_size = page_size
+        self.stats = stats
+
+    def get_page(self, endpoint, params, page):
+        """
+        Get one page of the endpoint items
+
+        :param endpoint: backend endpoint
+        :param params: search parameters, not modified
+        :param page: page number, starting from 1
+        :return: backend response
+        :rtype: dict
+        """
+        page_params = dict(params)
+        page_params['page'] = page
+        page_params['max_results'] = self.page_size
+        if self.stats is None:
+            return self.backend.get(endpoint, params=page_params)
+
+        self.stats.incr('backend_requests')
+        with self.stats.timer('backend_requests_time'):
+            return self.backend.get(endpoint, params=page_params)
+
+    @staticmethod
+    def count_pages(response):
+        """
+        Get the total number of pages from the _meta of a backend response
+
+        :param response: backend response
+        :return: number of pages, or None if the response has no pagination meta data
+        """
+        meta = response.get('_meta')
+        if not meta or 'total' not in meta or not meta.get('max_results'):
+            return None
+        # The backend may limit the page size, so use the one it really applied
+        return int(math.ceil(float(meta['total']) / float(meta['max_results'])))
+
+    def get_pages(self, endpoint, params):
+        """
+        Get all the pages matching the search parameters
+
+        :param endpoint: backend endpoint
+        :param params: search parameters
+        :return: generator of backend responses, in the pages order
+        """
+        return self.get_queries_pages(endpoint, [params])
+
+    def get_queries_pages(self, endpoint, queries):
+        """
+        Get all the pages matching several search parameters
+
+        The first pages of the queries are requested concurrently. As soon as the first page
+        of a query is received, its remaining pages are requested before the next queries.
+        The pages of a query are yielded in order, but they may be interleaved with the
+        pages of the other queries.
+
+        :param endpoint: backend endpoint
+        :param queries: list of search parameters
+        :return: generator of backend responses
+        """
+        tasks = deque((params, 1) for params in queries)
+        pending = deque()
+        pool = None
+        try:
+            while pending or tasks:
+                while tasks and len(pending) < self.workers:
+                    params, page = tasks.popleft()
+                    if pool is None and self.workers > 1 and (pending or tasks):
+                        # Only start the workers when several pages may be fetched at once
+                        from multiprocessing.pool import ThreadPool
+
+                        pool = ThreadPool(self.workers)
+                    if pool is None:
+                        pending.append((params, page, self.get_page(endpoint, params, page)))
+                    else:
+                        pending.append((params, page, pool.apply_async(
+                            self.get_page, (endpoint, params, page))))
+                params, page, response = pending.popleft()
+                if not isinstance(response, dict):
+                    response = response.get()
+                yield response
+
+                if page == 1:
+                    count = self.count_pages(response)
+                    if count is not None:
+                        logger.debug("Fetching %d pages with %d workers", count, self.workers)
+                        tasks.extendleft((params, next_page)
+                                         for next_page in range(count, 1, -1))
+                    elif 'next' in response.get('_links', {}):
+                        tasks.appendleft((params, 2))
+                elif self.count_pages(response) is None and \
+                        'next' in response.get('_links', {}):
+                    # No pagination meta data, follow the next links
+                    tasks.appendleft((params, page + 1))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
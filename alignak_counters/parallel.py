@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides the performance data parsing in a pool of worker processes
+
+The check result logs are sent to the workers by batches, one per backend page. Each
+worker parses the performance data, keeps the targeted metrics and sends back compact
+chunks: one (host, service, metric, Series) tuple per counter.
+"""
+import logging
+from collections import deque
+from multiprocessing import Pool
+
+from alignak_counters.perfdata import Metric, PerfDatasCache
+from alignak_counters.series import Counters
+
+logger = logging.getLogger('alignak-backend-counters')
+
+# Performance data cache of a worker process
+_perfdatas = None
+
+
+def init_worker(cache_size, names):
+    """
+    Initialize a worker process
+
+    :param cache_size: performance data cache size
+    :param names: targeted metrics names, None for all the metrics
+    :return: None
+    """
+    global _perfdatas  # pylint: disable=global-statement
+    _perfdatas = PerfDatasCache(cache_size, names)
+
+
+def parse_batch(batch):
+    """
+    Parse a batch of check result logs, in a worker process
+
+    :param batch: list of (host, service, last_check, perf_data) tuples
+    :return: (samples count, cache hits, cache misses, chunks) tuple
+    """
+    hits, misses = _perfdatas.hits, _perfdatas.misses
+    counters = Counters()
+    count = 0
+    for host, service, last_check, perf_data in batch:
+        try:
+            for metric in _perfdatas.get(perf_data):
+                counters.add(host, service, metric.name, last_check, metric.value,
+                             metric.uom, metric.max, metric.warning, metric.critical)
+                count += 1
+        except Exception as exp:
+            logger.exception("exception: %s", str(exp))
+
+    return (count, _perfdatas.hits - hits, _perfdatas.misses - misses,
+            list(counters.iter_series()))
+
+
+def iter_chunks_samples(chunks):
+    """
+    Get the samples of parsed chunks
+
+    The Metric of the samples only has its name, unit, maximum value and thresholds, the
+    ones of the last sample of its chunk.
+
+    :param chunks: chunks returned by parse_batch
+    :return: generator of (host, service, metric, timestamp, value, Metric) samples
+    """
+    for host, service, name, series in chunks:
+        metric = Metric()
+        metric.name = name
+        metric.uom = series.uom
+        metric.max = series.maximum
+        metric.warning = series.warning
+        metric.critical = series.critical
+        for timestamp, value in series:
+            yield host, service, name, timestamp, value, metric
+
+
+class ParallelParser(object):
+    """
+    Parse the check result logs in a pool of worker processes
+    """
+
+    def __init__(self, workers, cache_size=1024, names=None):
+        self.workers = workers
+        self.pool = Pool(workers, initializer=init_worker, initargs=(cache_size, names))
+
+    def parse(self, pages):
+        """
+        Parse pages of check result logs
+
+        No more than twice as many pages as workers are sent to the workers ahead of the
+        consumer, and the results are yielded in the pages order.
+
+        :param pages: iterable of lists of check result logs
+        :return: generator of (items, samples count, cache hits, cache misses, chunks)
+        """
+        pending = deque()
+        pages = iter(pages)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < 2 * self.workers:
+                try:
+                    items = next(pages)
+                except StopIteration:
+                    exhausted = True
+                    break
+                batch = [(item['host_name'], item['service_name'], item['last_check'],
+                          item.get('perf_data')) for item in items]
+                pending.append((items, self.pool.apply_async(parse_batch, (batch, ))))
+            if not pending:
+                return
+            items, result = pending.popleft()
+            yield (items, ) + result.get()
+
+    def close(self):
+        """
+        Stop the worker processes
+
+        :return: None
+        """
+        self.pool.close()
+        self.pool.join()
@@ -51,6 +51,7 @@
 This module provide classes to handle performance data from monitoring plugin output
 """
 import re
+from collections import OrderedDict
 # from alignak.util import to_best_int_float
 
 PERFDATA_SPLIT_PATTERN = re.compile(r'([^=]+=\S+)')
@@ -62,6 +63,22 @@ METRIC_PATTERN = \
         r"^([^=]+)=([\d\.\-\+eE]+)([\w\/%]*)"
         r";?([\d\.\-\+eE:~@]+)?;?([\d\.\-\+eE:~@]+)?;?([\d\.\-\+eE]+)?;?([\d\.\-\+eE]+)?;?\s*"
     )
+# Single pass pattern: it splits a performance data string as PERFDATA_SPLIT_PATTERN does
+# and, in the same match, gets the metric groups as METRIC_PATTERN does. The metric
+# groups are None when METRIC_PATTERN would not match.
+PERFDATA_PATTERN = \
+    re.compile(
+        r"([^=]+)=(?=\S)(?:([\d\.\-\+eE]+)([\w\/%]*)"
+        r";?([\d\.\-\+eE:~@]+)?;?([\d\.\-\+eE:~@]+)?;?([\d\.\-\+eE]+)?;?([\d\.\-\+eE]+)?)?\S*"
+    )
+# Targeted parsing patterns: the metric name and its raw value are split the same way
+# PERFDATA_SPLIT_PATTERN does, and only the values of the targeted metrics are matched
+PERFDATA_NAME_PATTERN = re.compile(r'([^=]+)=(\S+)')
+METRIC_VALUE_PATTERN = \
+    re.compile(
+        r"([\d\.\-\+eE]+)([\w\/%]*)"
+        r";?([\d\.\-\+eE:~@]+)?;?([\d\.\-\+eE:~@]+)?;?([\d\.\-\+eE]+)?;?([\d\.\-\+eE]+)?"
+    )
 
 
 def to_best_int_float(val):
@@ -81,8 +98,8 @@ def to_best_int_float(val):
     to_best_int_float("20")
     20
     """
-    integer = int(float(val))
     flt = float(val)
+    integer = int(flt)
     # If the f is a .0 value,
     # best match is int
     if integer == flt:
@@ -99,33 +116,46 @@ def guess_int_or_float(val):
     :return: value casted into int, float or None
     :rtype: int | float | NoneType
     """
+    if val is None:
+        return None
     try:
         return to_best_int_float(val)
     except (ValueError, TypeError):
         return None
 
 
-class Metric:  # pylint: disable=old-style-class, too-few-public-methods, fixme
+class Metric(object):  # pylint: disable=too-few-public-methods
     """
     Class providing a small abstraction for one metric of a Perfdatas class
     """
-    def __init__(self, string):
+    __slots__ = ('name', 'value', 'uom', 'warning', 'critical', 'min', 'max')
+
+    def __init__(self, string=None):
         self.name = self.value = self.uom = \
             self.warning = self.critical = self.min = self.max = None
+        if string is None:
+            return
         string = string.strip()
         matches = METRIC_PATTERN.match(string)
         if matches:
-            # Get the name but remove all ' in it
-            self.name = matches.group(1).replace("'", "")
-            self.value = guess_int_or_float(matches.group(2))
-            self.uom = matches.group(3)
-            self.warning = guess_int_or_float(matches.group(4))
-            self.critical = guess_int_or_float(matches.group(5))
-            self.min = guess_int_or_float(matches.group(6))
-            self.max = guess_int_or_float(matches.group(7))
-            if self.uom == '%':
-                self.min = 0
-                self.max = 100
+            self.set_values(*matches.groups())
+
+    def set_values(self, name, value, uom, warning, critical, minimum, maximum):
+        # pylint: disable=too-many-arguments
+        """
+        Set the metric from the groups matched by METRIC_PATTERN
+        """
+        # Get the name but remove all ' in it
+        self.name = name.replace("'", "")
+        self.value = guess_int_or_float(value)
+        self.uom = uom
+        self.warning = guess_int_or_float(warning)
+        self.critical = guess_int_or_float(critical)
+        self.min = guess_int_or_float(minimum)
+        self.max = guess_int_or_float(maximum)
+        if self.uom == '%':
+            self.min = 0
+            self.max = 100
 
     def __str__(self):
         string = "%s=%s%s" % (self.name, self.value, self.uom)
@@ -139,16 +169,39 @@ class Metric:  # pylint: disable=old-style-class, too-few-public-methods, fixme
 class PerfDatas:  # pylint: disable=old-style-class, too-few-public-methods
     """
     Class providing performance data extracted from a check output
+
+    If `names` is provided, only the metrics with those names are parsed, the other ones
+    are ignored.
     """
-    def __init__(self, string):
-        string = string or ''
-        elts = PERFDATA_SPLIT_PATTERN.findall(string)
-        elts = [e for e in elts if e != '']
+    def __init__(self, string, names=None):
         self.metrics = {}
-        for elem in elts:
-            metric = Metric(elem)
-            if metric.name is not None:
+        string = string or ''
+        if names is None:
+            for matches in PERFDATA_PATTERN.finditer(string):
+                groups = matches.groups()
+                # As the metric string is stripped, its name may only start with spaces
+                name = groups[0].lstrip()
+                if not name or groups[1] is None:
+                    continue
+                # No need to initialize the metric attributes, they are all set
+                metric = Metric.__new__(Metric)
+                metric.set_values(name, *groups[1:])
                 self.metrics[metric.name] = metric
+            return
+
+        # Quotes are removed from the metric names, so they may not be found in the string
+        if "'" not in string and not any(name in string for name in names):
+            return
+        for matches in PERFDATA_NAME_PATTERN.finditer(string):
+            name = matches.group(1).lstrip()
+            if not name or name.replace("'", "") not in names:
+                continue
+            values = METRIC_VALUE_PATTERN.match(matches.group(2))
+            if values is None:
+                continue
+            metric = Metric.__new__(Metric)
+            metric.set_values(name, *values.groups())
+            self.metrics[metric.name] = metric
 
     def __iter__(self):
         return self.metrics.itervalues()
@@ -161,3 +214,42 @@ class PerfDatas:  # pylint: disable=old-style-class, too-few-public-methods
 
     def __contains__(self, key):
         return key in self.metrics
+
+
+class PerfDatasCache(object):  # pylint: disable=too-few-public-methods
+    """
+    Least recently used cache of the PerfDatas parsed from performance data strings
+
+    Many services output the very same performance data on each check, the cache avoids
+    parsing them again. A cache size of 0 (or less) disables the cache. If `names` is provided, only
+    the metrics with those names are parsed.
+    """
+    def __init__(self, size=1024, names=None):
+        self.size = size
+        self.names = names
+        self.hits = 0
+        self.misses = 0
+        self.cache = OrderedDict()
+
+    def get(self, string):
+        """
+        Get the PerfDatas of a performance data string
+
+        The returned object is shared by all the callers, it must not be modified.
+
+        :param string: performance data string
+        :return: PerfDatas object
+        """
+        try:
+            perfdatas = self.cache.pop(string)
+            self.hits += 1
+        except KeyError:
+            self.misses += 1
+            perfdatas = PerfDatas(string, self.names)
+            if self.size <= 0:
+                return perfdatas
+            if len(self.cache) >= self.size:
+                # Forget about the least recently used
+                self.cache.popitem(last=False)
+        self.cache[string] = perfdatas
+        return perfdatas
@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides the processing stages applied to the extracted counters
+
+The stages exist in two flavours: one for the stored series, vectorized with numpy when
+it is installed, and one processing the samples one by one for the streaming mode.
+"""
+from alignak_counters.series import Counters, Series, get_numpy, to_json_value
+
+AGGREGATES = ('avg', 'min', 'max', 'sum', 'last', 'count')
+
+# Unit of the counters, that only increase
+COUNTER_UOM = 'c'
+
+
+def counter_delta(older, newer, maximum=None):
+    """
+    Get the increase of a counter between two samples
+
+    A decreasing counter either wrapped around its maximum value, if it is known, or was
+    reset, and then its increase is not known.
+
+    :param older: older sample value
+    :param newer: newer sample value
+    :param maximum: counter maximum value
+    :return: increase, or None if the counter was reset
+    """
+    delta = newer - older
+    if delta >= 0:
+        return delta
+    if maximum is not None and older <= maximum:
+        return delta + maximum + 1
+    return None
+
+
+def derive(series):
+    """
+    Get the per second rate of a counter series
+
+    Each rate sample is timestamped with the newer of the two samples it is computed from.
+    Samples with a missing value and counter resets are ignored.
+
+    :param series: Series object, sorted if needed
+    :return: Series object
+    """
+    series.sort()
+    maximum = series.maximum
+    numpy = get_numpy()
+    if numpy is None:
+        result = Series()
+        previous_timestamp = previous_value = None
+        for timestamp, value in zip(series.timestamps, series.values):
+            if value != value:
+                continue
+            if previous_timestamp is not None and timestamp > previous_timestamp:
+                delta = counter_delta(previous_value, value, maximum)
+                if delta is not None:
+                    result.append(timestamp, delta / (timestamp - previous_timestamp))
+            previous_timestamp, previous_value = timestamp, value
+        return result
+
+    timestamps, values = series.as_arrays()
+    kept = ~numpy.isnan(values)
+    timestamps, values = timestamps[kept], values[kept]
+    durations = numpy.diff(timestamps)
+    deltas = numpy.diff(values)
+    decreasing = deltas < 0
+    if maximum is not None:
+        wrapped = decreasing & (values[:-1] <= maximum)
+        deltas[wrapped] += maximum + 1
+        decreasing &= ~wrapped
+    kept = ~decreasing & (durations > 0)
+    return Series(timestamps[1:][kept], deltas[kept] / durations[kept])
+
+
+def seed_counters(counters, state):
+    """
+    Prepend the last samples of the previous incremental extraction to the counters series,
+    and store their new last samples in the extraction state, so that the rate between two
+    extractions is not lost
+
+    :param counters: Counters object
+    :param state: ExtractionState object
+    :return: None
+    """
+    for host, service, metric, series in counters.iter_series():
+        if series.uom != COUNTER_UOM:
+            continue
+        series.sort()
+        seed = state.get_counter(host, service, metric)
+        for index in range(len(series) - 1, -1, -1):
+            if series.values[index] == series.values[index]:
+                state.update_counter(host, service, metric, series.timestamps[index],
+                                     series.values[index])
+                break
+        if seed is not None and seed[0] < series.timestamps[0]:
+            series.append(*seed)
+
+
+def derive_counters(counters):
+    """
+    Replace the counters series with their per second rate
+
+    Only the series of metrics which unit is COUNTER_UOM are counters, the other ones are
+    not modified.
+
+    :param counters: Counters object
+    :return: Counters object
+    """
+    result = Counters()
+    for host, service, metric, series in counters.iter_series():
+        if series.uom == COUNTER_UOM:
+            series = derive(series)
+        result.hosts.setdefault(host, {}).setdefault(service, {})[metric] = series
+    return result
+
+
+class Bucket(object):
+    """
+    Aggregation of the samples of a time bucket
+    """
+    __slots__ = ('start', 'count', 'total', 'minimum', 'maximum',
+                 'last_timestamp', 'last_value')
+
+    def __init__(self, start):
+        self.start = start
+        self.count = 0
+        self.total = 0
+        self.minimum = self.maximum = None
+        self.last_timestamp = self.last_value = None
+
+    def add(self, timestamp, value):
+        """
+        Add a sample to the bucket
+
+        :return: None
+        """
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        if self.last_timestamp is None or timestamp >= self.last_timestamp:
+            self.last_timestamp = timestamp
+            self.last_value = value
+
+    def get(self, function):
+        """
+        Get the aggregated value of the bucket
+
+        :param function: one of the AGGREGATES
+        :return: aggregated value
+        """
+        if function == 'avg':
+            return float(self.total) / self.count
+        if function == 'min':
+            return self.minimum
+        if function == 'max':
+            return self.maximum
+        if function == 'sum':
+            return self.total
+        if function == 'last':
+            return self.last_value
+        return self.count
+
+
+def aggregate(series, function, bucket):
+    """
+    Aggregate the samples of a series per time bucket
+
+    Each bucket sample is timestamped with the bucket start. Missing values are ignored.
+
+    :param series: Series object, sorted if needed
+    :param function: one of the AGGREGATES
+    :param bucket: bucket duration, in seconds
+    :return: Series object
+    """
+    series.sort()
+    numpy = get_numpy()
+    if numpy is None:
+        result = Series()
+        current = None
+        for timestamp, value in zip(series.timestamps, series.values):
+            if value != value:
+                continue
+            start = timestamp - timestamp % bucket
+            if current is None or start != current.start:
+                if current is not None:
+                    result.append(current.start, current.get(function))
+                current = Bucket(start)
+            current.add(timestamp, value)
+        if current is not None:
+            result.append(current.start, current.get(function))
+        return result
+
+    timestamps, values = series.as_arrays()
+    kept = ~numpy.isnan(values)
+    timestamps, values = timestamps[kept], values[kept]
+    if timestamps.size == 0:
+        return Series()
+    starts = timestamps - numpy.mod(timestamps, bucket)
+    ends = numpy.append(numpy.flatnonzero(numpy.diff(starts)) + 1, len(values))
+    firsts = numpy.append(0, ends[:-1])
+    if function == 'avg':
+        aggregated = numpy.add.reduceat(values, firsts) / (ends - firsts)
+    elif function == 'min':
+        aggregated = numpy.minimum.reduceat(values, firsts)
+    elif function == 'max':
+        aggregated = numpy.maximum.reduceat(values, firsts)
+    elif function == 'sum':
+        aggregated = numpy.add.reduceat(values, firsts)
+    elif function == 'last':
+        aggregated = values[ends - 1]
+    else:
+        aggregated = ends - firsts
+    return Series(starts[firsts], aggregated)
+
+
+def aggregate_counters(counters, function, bucket):
+    """
+    Aggregate all the counters series per time bucket
+
+    :param counters: Counters object
+    :param function: one of the AGGREGATES
+    :param bucket: bucket duration, in seconds
+    :return: Counters object
+    """
+    result = Counters()
+    for host, service, metric, series in counters.iter_series():
+        result.hosts.setdefault(host, {}).setdefault(service, {})[metric] = \
+            aggregate(series, function, bucket)
+    return result
+
+
+class StreamAggregator(object):
+    """
+    Aggregation of streamed samples per time bucket
+
+    The samples of each counter must be streamed in time order, older or newer first: a
+    bucket is complete as soon as a sample of the same counter belongs to another bucket.
+    """
+
+    def __init__(self, function, bucket):
+        self.function = function
+        self.bucket = bucket
+        self.buckets = {}
+
+    def process(self, samples):
+        """
+        Aggregate samples
+
+        :param samples: iterable of (host, service, metric, timestamp, value, Metric) samples
+        :return: generator of the (host, service, metric, timestamp, value, None) samples of
+        the completed buckets
+        """
+        for host, service, metric, timestamp, value, _ in samples:
+            if value is None:
+                continue
+            key = (host, service, metric)
+            start = timestamp - timestamp % self.bucket
+            current = self.buckets.get(key)
+            if current is None or start != current.start:
+                if current is not None:
+                    yield self.get_sample(key, current)
+                current = self.buckets[key] = Bucket(start)
+            current.add(timestamp, value)
+
+    def flush(self):
+        """
+        Get the samples of the buckets still in progress
+
+        :return: generator of (host, service, metric, timestamp, value, None) samples
+        """
+        for key, current in self.buckets.items():
+            yield self.get_sample(key, current)
+        self.buckets = {}
+
+    def get_sample(self, key, current):
+        """
+        Get the aggregated sample of a bucket, with the value as the stored counters give it
+
+        :param key: (host, service, metric) of the counter
+        :param current: Bucket object
+        :return: (host, service, metric, timestamp, value, None) sample
+        """
+        return key + (current.start, to_json_value(float(current.get(self.function))), None)
+
+
+class StreamDeriver(object):
+    """
+    Per second rate of the streamed counters samples
+
+    The samples of each counter must be streamed in time order, older or newer first. The
+    samples of metrics which unit is not COUNTER_UOM are not modified.
+
+    An incremental extraction streams the samples older first, its first rates are computed
+    from the last samples of the previous extraction.
+
+    :param seeds: iterable of (host, service, metric, timestamp, value) last samples of the
+    previous extraction
+    """
+
+    def __init__(self, seeds=()):
+        self.previous = {}
+        for host, service, metric, timestamp, value in seeds:
+            self.previous[(host, service, metric)] = (host, service, metric, timestamp, value,
+                                                      None)
+        # Counters which last sample changed, see pop_updated
+        self.updated = set()
+
+    def process(self, samples):
+        """
+        Derive samples
+
+        :param samples: iterable of (host, service, metric, timestamp, value, Metric) samples
+        :return: generator of (host, service, metric, timestamp, value, Metric) samples
+        """
+        for sample in samples:
+            metric = sample[5]
+            if metric is None or metric.uom != COUNTER_UOM:
+                yield sample
+                continue
+            if sample[4] is None:
+                continue
+            key = sample[:3]
+            previous = self.previous.get(key)
+            self.previous[key] = sample
+            self.updated.add(key)
+            if previous is None or previous[3] == sample[3] or \
+                    (previous[5] is None and previous[3] > sample[3]):
+                # A seed newer than the sample is not a sample of this extraction
+                continue
+            older, newer = (previous, sample) if previous[3] < sample[3] else (sample, previous)
+            delta = counter_delta(older[4], newer[4], newer[5].max)
+            if delta is not None:
+                yield key + (newer[3], float(delta) / (newer[3] - older[3]), newer[5])
+
+    def pop_updated(self):
+        """
+        Get the last samples of the counters updated since the previous call
+
+        :return: list of (host, service, metric, timestamp, value) tuples
+        """
+        updated = [self.previous[key][:5] for key in self.updated]
+        self.updated.clear()
+        return updated
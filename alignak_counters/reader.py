@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides a reader of the binary counters exports
+
+The export file is memory-mapped and only its index is loaded, so that reading one series
+of a big export only reads the pages of this series. If numpy is installed, the series are
+numpy arrays sharing the mapped memory, else only the requested samples are copied::
+
+    with CountersReader('localhost.counters') as reader:
+        series = reader.get('localhost', 'load', 'load1', start=1464739200)
+        for timestamp, value in series:
+            ...
+"""
+import json
+import mmap
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+
+from alignak_counters.series import to_json_value
+from alignak_counters.writers import BINARY_HEADER, BINARY_MAGIC, BINARY_VERSION
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover, numpy is optional
+    numpy = None
+
+# Little endian float64
+FLOAT64 = struct.Struct('<d')
+
+
+class MappedFloats(object):
+    """
+    Read-only sequence of the float64 of a mapped block, used for the binary searches
+    when numpy is not installed
+    """
+
+    def __init__(self, data, offset, count):
+        self.data = data
+        self.offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return FLOAT64.unpack_from(self.data, self.offset + 8 * index)[0]
+
+    def copy(self, first, last):
+        """
+        Copy a range of the floats
+
+        :return: array('d')
+        """
+        return array('d', struct.unpack_from('<%dd' % (last - first), self.data,
+                                             self.offset + 8 * first))
+
+
+class SeriesView(object):
+    """
+    Time series of one metric read from an export
+
+    The timestamps and values are numpy arrays if numpy is installed, else arrays of floats.
+    """
+    __slots__ = ('timestamps', 'values', 'uom', 'maximum')
+
+    def __init__(self, timestamps, values, uom=None, maximum=None):
+        self.timestamps = timestamps
+        self.values = values
+        self.uom = uom
+        self.maximum = maximum
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __iter__(self):
+        """Iterate over the (timestamp, value) samples, as they were extracted"""
+        for index in range(len(self.timestamps)):
+            yield (to_json_value(float(self.timestamps[index])),
+                   to_json_value(float(self.values[index])))
+
+
+class CountersReader(object):
+    """
+    Reader of a binary counters export, see writers.BinaryWriter
+
+    The series views share the mapped file memory: they must not be used anymore once the
+    reader is closed.
+
+    :param filename: export file
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError("%s is not a binary counters export" % filename)
+
+        try:
+            magic, version, _, index_offset, _ = BINARY_HEADER.unpack_from(self.map)
+        except struct.error:
+            magic = version = None
+        if magic != BINARY_MAGIC:
+            self.close()
+            raise ValueError("%s is not a binary counters export" % filename)
+        if version != BINARY_VERSION:
+            self.close()
+            raise ValueError("%s export version %d is not supported" % (filename, version))
+
+        self.index = {}
+        for host, service, metric, offset, count, uom, maximum in \
+                json.loads(self.map[index_offset:].decode('utf-8')):
+            self.index[(host, service, metric)] = (offset, count, uom, maximum)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def keys(self):
+        """
+        Get the exported counters
+
+        :return: sorted list of (host, service, metric) tuples
+        """
+        return sorted(self.index)
+
+    def get(self, host, service, metric, start=None, end=None):
+        # pylint: disable=too-many-arguments
+        """
+        Get the samples of a counter, in a time range
+
+        The time range is found by binary searches in the sorted timestamps.
+
+        :param start: first timestamp, included
+        :param end: last timestamp, included
+        :return: SeriesView object, or None if the counter is not exported
+        """
+        if (host, service, metric) not in self.index:
+            return None
+        offset, count, uom, maximum = self.index[(host, service, metric)]
+
+        if numpy is not None:
+            timestamps = numpy.frombuffer(self.map, dtype='<f8', count=count, offset=offset)
+            values = numpy.frombuffer(self.map, dtype='<f8', count=count,
+                                      offset=offset + 8 * count)
+            first = 0 if start is None else numpy.searchsorted(timestamps, start, 'left')
+            last = count if end is None else numpy.searchsorted(timestamps, end, 'right')
+            return SeriesView(timestamps[first:last], values[first:last], uom, maximum)
+
+        timestamps = MappedFloats(self.map, offset, count)
+        values = MappedFloats(self.map, offset + 8 * count, count)
+        first = 0 if start is None else bisect_left(timestamps, start)
+        last = count if end is None else bisect_right(timestamps, end)
+        return SeriesView(timestamps.copy(first, last), values.copy(first, last),
+                          uom, maximum)
+
+    def close(self):
+        """
+        Unmap and close the export file
+
+        :return: None
+        """
+        try:
+            self.map.close()
+        except BufferError:
+            # Some numpy views are still used, the file is unmapped when they are released
+            pass
+        self.file.close()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides a compact storage for the extracted counters
+
+Each time series is stored as two arrays of floats, one for the timestamps and one for
+the values, which uses about 16 bytes per sample. If numpy is installed, the arrays can be
+used as numpy arrays without any copy.
+"""
+import json
+from array import array
+from bisect import bisect_left, bisect_right
+
+# numpy is long to import, it is imported when the first series is sorted or converted
+NOT_IMPORTED = object()
+_numpy = NOT_IMPORTED
+
+
+def get_numpy():
+    """
+    Get the numpy module, imported on the first call
+
+    :return: numpy module, or None if numpy is not installed
+    """
+    global _numpy  # pylint: disable=global-statement
+    if _numpy is NOT_IMPORTED:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover, numpy is optional
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+def to_json_value(value):
+    """
+    Get a stored float as it was extracted
+
+    The performance data values are integers when they have no decimal part, and missing
+    values are stored as NaN.
+
+    :param value: stored value
+    :return: None, int or float
+    """
+    if value != value:
+        return None
+    if value.is_integer():
+        return int(value)
+    return value
+
+
+class Series(object):
+    """
+    Time series of one metric
+
+    The unit, the maximum value and the thresholds of the metric are the ones of its last
+    sample.
+    """
+    __slots__ = ('timestamps', 'values', 'ordered', 'uom', 'maximum', 'warning', 'critical')
+
+    def __init__(self, timestamps=(), values=()):
+        self.timestamps = array('d', timestamps)
+        self.values = array('d', values)
+        self.uom = self.maximum = self.warning = self.critical = None
+        self.ordered = all(self.timestamps[index - 1] <= self.timestamps[index]
+                           for index in range(1, len(self.timestamps)))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __iter__(self):
+        """Iterate over the (timestamp, value) samples, as they were extracted"""
+        for index in range(len(self.timestamps)):
+            yield (to_json_value(self.timestamps[index]), to_json_value(self.values[index]))
+
+    def append(self, timestamp, value):
+        """
+        Append a sample to the series
+
+        :param timestamp: sample timestamp
+        :param value: sample value, None if it is missing
+        :return: None
+        """
+        if self.ordered and self.timestamps and timestamp < self.timestamps[-1]:
+            self.ordered = False
+        self.timestamps.append(timestamp)
+        self.values.append(float('nan') if value is None else value)
+
+    def extend(self, series):
+        """
+        Append all the samples of another series
+
+        :param series: Series object
+        :return: None
+        """
+        if self.ordered and (not series.ordered or (
+                self.timestamps and series.timestamps and
+                series.timestamps[0] < self.timestamps[-1])):
+            self.ordered = False
+        self.timestamps.extend(series.timestamps)
+        self.values.extend(series.values)
+
+    def sort(self):
+        """
+        Sort the samples by timestamp
+
+        :return: None
+        """
+        if self.ordered:
+            return
+        numpy = get_numpy()
+        if numpy is not None:
+            timestamps, values = self.as_arrays()
+            order = numpy.argsort(timestamps, kind='mergesort')
+            self.timestamps = array('d', timestamps[order].tobytes())
+            self.values = array('d', values[order].tobytes())
+        else:
+            order = sorted(range(len(self.timestamps)), key=self.timestamps.__getitem__)
+            self.timestamps = array('d', (self.timestamps[index] for index in order))
+            self.values = array('d', (self.values[index] for index in order))
+        self.ordered = True
+
+    def slice(self, start=None, end=None):
+        """
+        Get the samples of a time range, the series is sorted if needed
+
+        :param start: first timestamp, included
+        :param end: last timestamp, included
+        :return: Series object
+        """
+        self.sort()
+        first = 0 if start is None else bisect_left(self.timestamps, start)
+        last = len(self.timestamps) if end is None else bisect_right(self.timestamps, end)
+        series = Series()
+        series.timestamps = self.timestamps[first:last]
+        series.values = self.values[first:last]
+        series.uom = self.uom
+        series.maximum = self.maximum
+        series.warning = self.warning
+        series.critical = self.critical
+        return series
+
+    def as_arrays(self):
+        """
+        Get the timestamps and values arrays
+
+        The numpy arrays share the series memory, they must not be used anymore once some
+        samples are appended to the series.
+
+        :return: numpy arrays if numpy is installed, else the series arrays themselves
+        """
+        numpy = get_numpy()
+        if numpy is None:
+            return self.timestamps, self.values
+        return (numpy.frombuffer(self.timestamps, dtype=numpy.float64),
+                numpy.frombuffer(self.values, dtype=numpy.float64))
+
+
+class Counters(object):
+    """
+    Extracted counters time series, per host, service and metric
+    """
+
+    def __init__(self):
+        self.hosts = {}
+
+    def __len__(self):
+        return sum(len(metrics) for services in self.hosts.values()
+                   for metrics in services.values())
+
+    def add(self, host, service, metric, timestamp, value, uom=None, maximum=None,
+            warning=None, critical=None):
+        # pylint: disable=too-many-arguments
+        """
+        Add a sample to a counter series
+
+        :return: None
+        """
+        services = self.hosts.get(host)
+        if services is None:
+            services = self.hosts[host] = {}
+        metrics = services.get(service)
+        if metrics is None:
+            metrics = services[service] = {}
+        series = metrics.get(metric)
+        if series is None:
+            series = metrics[metric] = Series()
+        series.append(timestamp, value)
+        series.uom = uom
+        series.maximum = maximum
+        series.warning = warning
+        series.critical = critical
+
+    def add_series(self, host, service, metric, series):
+        """
+        Add the samples of a series to a counter series
+
+        :param series: Series object
+        :return: None
+        """
+        metrics = self.hosts.setdefault(host, {}).setdefault(service, {})
+        if metric not in metrics:
+            metrics[metric] = Series()
+        metrics[metric].extend(series)
+        metrics[metric].uom = series.uom
+        metrics[metric].maximum = series.maximum
+        metrics[metric].warning = series.warning
+        metrics[metric].critical = series.critical
+
+    def get(self, host, service, metric):
+        """
+        Get a counter series
+
+        :return: Series object, or None if the counter does not exist
+        """
+        return self.hosts.get(host, {}).get(service, {}).get(metric)
+
+    def iter_series(self):
+        """
+        Iterate over all the counters series
+
+        :return: generator of (host, service, metric, Series) tuples
+        """
+        for host, services in self.hosts.items():
+            for service, metrics in services.items():
+                for metric, series in metrics.items():
+                    yield host, service, metric, series
+
+    def to_dict(self):
+        """
+        Get the counters as nested dictionaries of lists of (timestamp, value) samples
+
+        :return: dict
+        """
+        return dict((host, dict((service, dict((metric, list(series))
+                                               for metric, series in metrics.items()))
+                                for service, metrics in services.items()))
+                    for host, services in self.hosts.items())
+
+    def write_json(self, output):
+        """
+        Write the counters as JSON, series after series, without building the nested
+        dictionaries of to_dict
+
+        :param output: file-like object
+        :return: None
+        """
+        output.write("{")
+        for host_index, (host, services) in enumerate(self.hosts.items()):
+            output.write("%s%s: {" % (", " if host_index else "", json.dumps(host)))
+            for service_index, (service, metrics) in enumerate(services.items()):
+                output.write("%s%s: {" % (", " if service_index else "", json.dumps(service)))
+                for metric_index, (metric, series) in enumerate(metrics.items()):
+                    output.write("%s%s: %s" % (", " if metric_index else "", json.dumps(metric),
+                                               json.dumps(list(series))))
+                output.write("}")
+            output.write("}")
+        output.write("}")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides the backend client used by the counters extraction
+
+It is the alignak_backend_client Backend class, with a pool of keep-alive connections as
+large as the number of concurrent workers, so that the pages requested concurrently do not
+each pay a new TCP connection, and with the received data statistics. The retries of the
+client are kept.
+"""
+import time
+import threading
+
+from requests.adapters import HTTPAdapter
+
+from alignak_backend_client.client import Backend
+
+
+class PooledBackend(Backend):
+    """
+    Backend client sharing a pool of keep-alive connections between threads
+
+    :param endpoint: backend URL
+    :param connections: number of connections kept open, one per concurrent worker
+    """
+
+    def __init__(self, endpoint, connections=4):
+        super(PooledBackend, self).__init__(endpoint)
+        for prefix in ('http://', 'https://'):
+            retries = self.session.get_adapter(prefix).max_retries
+            self.session.mount(prefix, HTTPAdapter(pool_maxsize=max(1, connections),
+                                                   max_retries=retries))
+
+        # Received data statistics
+        self.lock = threading.Lock()
+        self.bytes_received = 0
+        self.decoding_time = 0.0
+
+    def decode(self, response):  # pylint: disable=arguments-differ
+        """
+        Decode the JSON response, counting the received bytes and the decoding time
+
+        :param response: requests.response object
+        :return: decoded response
+        :rtype: dict
+        :raise BackendException: on backend errors
+        """
+        start = time.time()
+        try:
+            return Backend.decode(response)
+        finally:
+            with self.lock:
+                self.bytes_received += len(response.content)
+                self.decoding_time += time.time() - start
@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides the sinks the daemon pushes the extracted samples to
+
+* graphite://host[:2003][/prefix]: Graphite plaintext protocol over TCP
+* influx://host[:8089]: InfluxDB line protocol over UDP
+* influx+tcp://host[:8094]: InfluxDB line protocol over TCP, for a Telegraf socket listener
+* file:///path/file.ndjson: ndjson lines appended to a file
+
+A sink writes the samples by batches. A batch which cannot be written raises a SinkError,
+and the daemon writes it again later.
+"""
+import re
+import socket
+import logging
+
+try:
+    from urlparse import urlparse
+except ImportError:  # pragma: no cover, Python 3
+    from urllib.parse import urlparse
+
+from alignak_counters.writers import NdjsonWriter
+
+logger = logging.getLogger('alignak-backend-counters')
+
+# Maximum size of the UDP datagrams, the lines are never split
+DATAGRAM_SIZE = 1400
+
+# Characters of the names which are not allowed in a Graphite path node
+GRAPHITE_SPECIALS = re.compile(r'[\s.;/\\]')
+
+
+class SinkError(Exception):
+    """
+    Error raised when a batch of samples cannot be written to a sink
+    """
+    pass
+
+
+def get_float(value):
+    """
+    Get a sample value as a float, the sinks only store numeric values
+
+    :return: float, or None if the value is not numeric
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Sink(object):
+    """
+    Base class of the sinks
+    """
+
+    def write(self, samples):
+        """
+        Write a batch of samples
+
+        :param samples: list of (host, service, metric, timestamp, value, Metric) samples
+        :return: None
+        :raise SinkError: if the samples cannot be written
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Release the sink resources
+
+        :return: None
+        """
+        pass
+
+
+class WriterSink(Sink):
+    """
+    Sink writing the samples with a streamable output writer
+
+    :param writer: streamable Writer object
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def write(self, samples):
+        try:
+            self.writer.write_samples(samples)
+        except (IOError, OSError) as exp:
+            raise SinkError("Output write error: %s" % exp)
+
+    def close(self):
+        self.writer.close()
+
+
+class SocketSink(Sink):
+    """
+    Base class of the line protocol sinks
+
+    The TCP connection is opened on the first write, and opened again on the next write
+    after an error.
+
+    :param host: sink host name or address
+    :param port: sink port
+    :param udp: send the lines as UDP datagrams instead of a TCP stream
+    :param timeout: connection and send timeout, in seconds
+    """
+
+    def __init__(self, host, port, udp=False, timeout=10):
+        self.host = host
+        self.port = port
+        self.udp = udp
+        self.timeout = timeout
+        self.socket = None
+
+    def get_line(self, host, service, metric, timestamp, value):
+        # pylint: disable=too-many-arguments
+        """
+        Format a sample in the sink protocol
+
+        :return: line, with its end of line
+        """
+        raise NotImplementedError()
+
+    def get_lines(self, samples):
+        """
+        Format the numeric samples in the sink protocol
+
+        :return: list of UTF-8 encoded lines
+        """
+        lines = []
+        for host, service, metric, timestamp, value, _ in samples:
+            value = get_float(value)
+            if value is None:
+                continue
+            lines.append(self.get_line(host, service, metric, timestamp, value).encode('utf-8'))
+        return lines
+
+    def connect(self):
+        """
+        Open the socket
+
+        :return: None
+        """
+        if self.udp:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.socket.connect((self.host, self.port))
+        else:
+            self.socket = socket.create_connection((self.host, self.port), self.timeout)
+            logger.info("Connected to the sink %s:%d", self.host, self.port)
+        self.socket.settimeout(self.timeout)
+
+    def write(self, samples):
+        lines = self.get_lines(samples)
+        if not lines:
+            return
+        try:
+            if self.socket is None:
+                self.connect()
+            if self.udp:
+                for datagram in get_datagrams(lines):
+                    self.socket.send(datagram)
+            else:
+                self.socket.sendall(b''.join(lines))
+        except (socket.error, socket.timeout) as exp:
+            self.close()
+            raise SinkError("Sink %s:%d error: %s" % (self.host, self.port, exp))
+
+    def close(self):
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+
+def get_datagrams(lines):
+    """
+    Group lines in datagrams of at most DATAGRAM_SIZE bytes, a longer line being sent alone
+
+    :param lines: list of encoded lines
+    :return: generator of bytes
+    """
+    datagram = []
+    size = 0
+    for line in lines:
+        if datagram and size + len(line) > DATAGRAM_SIZE:
+            yield b''.join(datagram)
+            datagram = []
+            size = 0
+        datagram.append(line)
+        size += len(line)
+    if datagram:
+        yield b''.join(datagram)
+
+
+class GraphiteSink(SocketSink):
+    """
+    Graphite plaintext protocol: prefix.host.service.metric value timestamp
+
+    The dots and spaces of the names are replaced, so that each name is one path node.
+
+    :param prefix: metrics path prefix, None for no prefix
+    """
+
+    def __init__(self, host, port=2003, prefix=None, udp=False, timeout=10):
+        # pylint: disable=too-many-arguments
+        super(GraphiteSink, self).__init__(host, port, udp, timeout)
+        self.prefix = prefix.strip('.') if prefix else None
+
+    @staticmethod
+    def get_node(name):
+        """
+        Get a Graphite path node from a name
+
+        :return: name with its special characters replaced by _
+        """
+        return GRAPHITE_SPECIALS.sub('_', name)
+
+    def get_line(self, host, service, metric, timestamp, value):
+        # pylint: disable=too-many-arguments
+        path = '.'.join(self.get_node(name) for name in (host, service, metric))
+        if self.prefix:
+            path = '%s.%s' % (self.prefix, path)
+        return u"%s %r %d\n" % (path, value, timestamp)
+
+
+class InfluxSink(SocketSink):
+    """
+    InfluxDB line protocol: metric,host=host,service=service value=value timestamp
+
+    The timestamps are sent in nanoseconds, the default precision of InfluxDB.
+    """
+
+    def __init__(self, host, port=8089, udp=True, timeout=10):
+        super(InfluxSink, self).__init__(host, port, udp, timeout)
+
+    @staticmethod
+    def escape(name):
+        """
+        Escape the special characters of a measurement or a tag
+
+        :return: escaped name
+        """
+        return name.replace(',', '\\,').replace('=', '\\=').replace(' ', '\\ ')
+
+    def get_line(self, host, service, metric, timestamp, value):
+        # pylint: disable=too-many-arguments
+        return u"%s,host=%s,service=%s value=%r %d000000000\n" % (
+            self.escape(metric), self.escape(host), self.escape(service), value, timestamp)
+
+
+def get_sink(url):
+    """
+    Get a sink from its URL, see the module documentation
+
+    :param url: sink URL
+    :return: Sink object
+    :raise ValueError: if the URL is not a valid sink URL
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == 'file':
+        if not parsed.path:
+            raise ValueError("Sink file name is missing: %s" % url)
+        return WriterSink(NdjsonWriter(open(parsed.path, 'a')))
+    if not parsed.hostname:
+        raise ValueError("Sink host name is missing: %s" % url)
+    try:
+        port = parsed.port
+    except ValueError:
+        raise ValueError("Sink port is not valid: %s" % url)
+    if parsed.scheme == 'graphite':
+        return GraphiteSink(parsed.hostname, port or 2003,
+                            prefix=parsed.path.strip('/').replace('/', '.'))
+    if parsed.scheme == 'influx':
+        return InfluxSink(parsed.hostname, port or 8089)
+    if parsed.scheme == 'influx+tcp':
+        return InfluxSink(parsed.hostname, port or 8094, udp=False)
+    raise ValueError("Sink must be one of graphite://, influx://, influx+tcp:// or file:// URLs")
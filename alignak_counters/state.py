@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides the extraction state used for incremental extractions
+"""
+import os
+import json
+import copy
+import logging
+
+logger = logging.getLogger('alignak-backend-counters')
+
+# Version of the state file format, the first format had no version
+STATE_VERSION = 2
+
+
+class ExtractionState(object):
+    """
+    Last check date extracted for each host / service, persisted in a JSON file
+
+    The checkpoints are a dictionary of hosts, each one being a dictionary of the last check
+    timestamp of its services. The counters are the last [timestamp, value] sample of the
+    counter metrics, per host, service and metric, so that their rate is computed from it
+    by the next extraction. The file contains both, and the format version.
+
+    The hosts / services which were not checked for longer than the horizon before the
+    newest check are forgotten, so that a removed service, or one rarely checked, does not
+    hold back the lower bound of the next extractions.
+
+    :param filename: state file, None to only keep the state in memory
+    :param horizon: duration in seconds, None to never forget an host / service
+    """
+
+    def __init__(self, filename=None, horizon=None):
+        self.filename = filename
+        self.horizon = horizon
+        self.checkpoints = {}
+        self.counters = {}
+        if filename is not None and os.path.exists(filename):
+            with open(filename) as state_file:
+                state = json.load(state_file)
+            if state.get('version') == STATE_VERSION:
+                self.checkpoints = state['checkpoints']
+                self.counters = state['counters']
+            else:
+                # First format, only the checkpoints
+                self.checkpoints = state
+            logger.info("Loaded extraction state from %s", filename)
+
+    def get(self, host, service):
+        """
+        Get the last check date extracted for an host / service
+
+        :return: timestamp, or None if nothing was extracted yet
+        """
+        return self.checkpoints.get(host, {}).get(service)
+
+    def is_new(self, host, service, last_check):
+        """
+        Check if a check result log of an host / service was not yet extracted
+
+        :return: True if the log is newer than the last check date extracted
+        """
+        checkpoint = self.get(host, service)
+        return checkpoint is None or last_check > checkpoint
+
+    def update(self, host, service, last_check):
+        """
+        Update the last check date extracted for an host / service
+
+        :return: None
+        """
+        services = self.checkpoints.setdefault(host, {})
+        if services.get(service) is None or last_check > services[service]:
+            services[service] = last_check
+
+    def get_counter(self, host, service, metric):
+        """
+        Get the last extracted sample of a counter
+
+        :return: (timestamp, value) tuple, or None if nothing was extracted yet
+        """
+        sample = self.counters.get(host, {}).get(service, {}).get(metric)
+        return None if sample is None else tuple(sample)
+
+    def update_counter(self, host, service, metric, timestamp, value):
+        # pylint: disable=too-many-arguments
+        """
+        Update the last extracted sample of a counter
+
+        :return: None
+        """
+        metrics = self.counters.setdefault(host, {}).setdefault(service, {})
+        if metric not in metrics or timestamp > metrics[metric][0]:
+            metrics[metric] = [timestamp, value]
+
+    def iter_counters(self):
+        """
+        Iterate over the last extracted samples of the counters
+
+        :return: generator of (host, service, metric, timestamp, value) tuples
+        """
+        for host, services in self.counters.items():
+            for service, metrics in services.items():
+                for metric, (timestamp, value) in metrics.items():
+                    yield host, service, metric, timestamp, value
+
+    def snapshot(self):
+        """
+        Get a copy of the checkpoints and counters, to restore them if the extraction fails
+
+        :return: opaque snapshot
+        """
+        return copy.deepcopy((self.checkpoints, self.counters))
+
+    def restore(self, snapshot):
+        """
+        Restore the checkpoints and counters of a snapshot
+
+        :param snapshot: snapshot got from the snapshot method
+        :return: None
+        """
+        self.checkpoints, self.counters = copy.deepcopy(snapshot)
+
+    def get_horizon_date(self):
+        """
+        Get the date before which the hosts / services are forgotten
+
+        :return: timestamp, or None if no host / service is forgotten
+        """
+        if self.horizon is None:
+            return None
+        dates = [last_check for services in self.checkpoints.values()
+                 for last_check in services.values()]
+        if not dates:
+            return None
+        return max(dates) - self.horizon
+
+    def lower_bound(self, hosts=None, services=None):
+        """
+        Get the oldest last check date of the targeted hosts / services
+
+        Logs older than this date were already extracted for all the known targeted hosts /
+        services, except the ones past the horizon.
+
+        :param hosts: targeted hosts names, None for all the hosts
+        :param services: targeted services names, None for all the services
+        :return: timestamp, or None if no targeted host / service was extracted yet
+        """
+        horizon_date = self.get_horizon_date()
+        if hosts is None:
+            hosts = self.checkpoints.keys()
+        if services is not None:
+            services = set(services)
+        dates = [last_check for host in hosts
+                 for service, last_check in self.checkpoints.get(host, {}).items()
+                 if (services is None or service in services) and
+                 (horizon_date is None or last_check >= horizon_date)]
+        if not dates:
+            return None
+        return min(dates)
+
+    def prune(self):
+        """
+        Forget the hosts / services past the horizon
+
+        :return: number of forgotten hosts / services
+        """
+        horizon_date = self.get_horizon_date()
+        if horizon_date is None:
+            return 0
+        removed = 0
+        for host, services in list(self.checkpoints.items()):
+            for service, last_check in list(services.items()):
+                if last_check < horizon_date:
+                    del services[service]
+                    removed += 1
+            if not services:
+                del self.checkpoints[host]
+        # The counters of the forgotten hosts / services
+        for host, services in list(self.counters.items()):
+            for service in list(services):
+                if self.get(host, service) is None:
+                    del services[service]
+            if not services:
+                del self.counters[host]
+        if removed:
+            logger.info("Extraction state: %d hosts / services not checked anymore", removed)
+        return removed
+
+    def save(self):
+        """
+        Save the state to its file
+
+        The state is written to a temporary file renamed afterwards, so that an interrupted
+        run never leaves a truncated state file.
+
+        :return: None
+        """
+        if self.filename is None:
+            return
+        self.prune()
+        temp_filename = "%s.tmp" % self.filename
+        with open(temp_filename, 'w') as state_file:
+            json.dump({'version': STATE_VERSION, 'checkpoints': self.checkpoints,
+                       'counters': self.counters}, state_file)
+        os.rename(temp_filename, self.filename)
+        logger.debug("Saved extraction state to %s", self.filename)
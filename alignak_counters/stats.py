@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides the timers and counters of the extraction stages
+
+The timers are measured per backend page, not per item, so that they cost few. The time
+of the concurrent backend requests is cumulated, it may be more than the elapsed time.
+"""
+import re
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class Stats(object):
+    """
+    Timers and counters, shared by the threads of an extraction
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers = OrderedDict()
+        self.counters = OrderedDict()
+
+    @contextmanager
+    def timer(self, name):
+        """
+        Measure the duration of a block of code
+
+        :param name: timer name
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.time() - start)
+
+    def add_time(self, name, duration):
+        """
+        Add a duration to a timer
+
+        :param name: timer name
+        :param duration: duration, in seconds
+        :return: None
+        """
+        with self.lock:
+            self.timers[name] = self.timers.get(name, 0.0) + duration
+
+    def incr(self, name, count=1):
+        """
+        Increment a counter
+
+        :param name: counter name
+        :param count: increment
+        :return: None
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + count
+
+    def set(self, name, value):
+        """
+        Set a counter value
+
+        :return: None
+        """
+        with self.lock:
+            self.counters[name] = value
+
+    def merge(self, other):
+        """
+        Add the timers and counters of other statistics
+
+        :param other: Stats object
+        :return: None
+        """
+        with other.lock:
+            timers = list(other.timers.items())
+            counters = list(other.counters.items())
+        for name, duration in timers:
+            self.add_time(name, duration)
+        for name, value in counters:
+            self.incr(name, value)
+
+    def to_dict(self):
+        """
+        Get the timers and counters
+
+        :return: dict of the timers (seconds) and counters values
+        """
+        with self.lock:
+            return {'timers': dict(self.timers), 'counters': dict(self.counters)}
+
+    def get_summary(self):
+        """
+        Get a human readable summary
+
+        :return: list of lines
+        """
+        lines = ["Extraction statistics:"]
+        lines.extend("    %-24s %12.3fs" % (name, duration)
+                     for name, duration in self.timers.items())
+        lines.extend("    %-24s %12d" % (name, value) for name, value in self.counters.items())
+        return lines
+
+    def get_perfdata(self):
+        """
+        Get the timers and counters as performance data, about the exporter itself
+
+        :return: performance data string
+        """
+        metrics = ["%s=%.3fs" % (re.sub(r'\W', '_', name), duration)
+                   for name, duration in self.timers.items()]
+        metrics.extend("%s=%d%s" % (re.sub(r'\W', '_', name), value,
+                                    'B' if name.endswith('bytes') else '')
+                       for name, value in self.counters.items())
+        return ' '.join(metrics)
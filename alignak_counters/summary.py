@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides the summary of the extracted counters, computed in one streaming pass
+without storing the samples
+
+Each series is summarized with its count, minimum, maximum, mean, percentiles and the time
+spent above its warning and critical thresholds. The percentiles are estimated with a
+QuantileSketch, which memory does not depend on the number of samples, and which can be
+merged with the sketch of another extraction.
+"""
+import math
+from collections import OrderedDict
+
+# Relative accuracy of the percentiles
+DEFAULT_ACCURACY = 0.01
+# Maximum number of buckets of a sketch, per sign of the values
+DEFAULT_MAX_BINS = 2048
+# Absolute values under this one are counted as zeros
+MIN_VALUE = 1e-9
+
+
+class QuantileSketch(object):
+    """
+    Mergeable quantile sketch with a relative accuracy, as DDSketch
+
+    The values are counted in buckets which bounds grow geometrically, so that any value of
+    a bucket is at most accuracy away from the bucket value, relatively. When there are too
+    many buckets, the lowest ones are collapsed: only the lowest quantiles lose accuracy.
+
+    :param accuracy: relative accuracy of the quantiles
+    :param max_bins: maximum number of buckets, per sign of the values
+    """
+    __slots__ = ('accuracy', 'gamma', 'log_gamma', 'max_bins', 'positive', 'negative',
+                 'zeros', 'count')
+
+    def __init__(self, accuracy=DEFAULT_ACCURACY, max_bins=DEFAULT_MAX_BINS):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value):
+        """
+        Count a value
+
+        :return: None
+        """
+        self.count += 1
+        if value > MIN_VALUE:
+            bins = self.positive
+        elif value < -MIN_VALUE:
+            bins = self.negative
+            value = -value
+        else:
+            self.zeros += 1
+            return
+        index = int(math.ceil(math.log(value) / self.log_gamma))
+        bins[index] = bins.get(index, 0) + 1
+        if len(bins) > self.max_bins:
+            self.collapse(bins)
+
+    def collapse(self, bins):
+        """
+        Merge the lowest buckets of a sign, so that there are at most max_bins buckets
+
+        :return: None
+        """
+        indexes = sorted(bins)
+        lowest = indexes[len(indexes) - self.max_bins]
+        for index in indexes[:len(indexes) - self.max_bins]:
+            bins[lowest] += bins.pop(index)
+
+    def merge(self, other):
+        """
+        Add the values counted by another sketch
+
+        :param other: QuantileSketch object with the same accuracy
+        :return: None
+        :raise ValueError: if the sketches accuracy are different
+        """
+        if other.accuracy != self.accuracy:
+            raise ValueError("Sketches with different accuracies cannot be merged")
+        for bins, other_bins in ((self.positive, other.positive),
+                                 (self.negative, other.negative)):
+            for index, count in other_bins.items():
+                bins[index] = bins.get(index, 0) + count
+            if len(bins) > self.max_bins:
+                self.collapse(bins)
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def get_value(self, index):
+        """
+        Get the value of a bucket, the closest one to all the bucket values, relatively
+
+        :return: float
+        """
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def quantile(self, quantile):
+        """
+        Get an estimation of a quantile of the values
+
+        :param quantile: quantile, between 0 and 1
+        :return: value, or None if no value was counted
+        """
+        if not self.count:
+            return None
+        rank = quantile * (self.count - 1)
+        seen = 0
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -self.get_value(index)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return self.get_value(index)
+        return None
+
+    def to_dict(self):
+        """
+        Get the sketch as a dictionary, to be stored as JSON and merged later
+
+        :return: dict
+        """
+        return {'accuracy': self.accuracy, 'max_bins': self.max_bins, 'zeros': self.zeros,
+                'positive': [[index, count] for index, count in sorted(self.positive.items())],
+                'negative': [[index, count] for index, count in sorted(self.negative.items())]}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Get a sketch from a dictionary returned by to_dict
+
+        :return: QuantileSketch object
+        """
+        sketch = cls(data['accuracy'], data['max_bins'])
+        sketch.zeros = data['zeros']
+        sketch.positive = dict((index, count) for index, count in data['positive'])
+        sketch.negative = dict((index, count) for index, count in data['negative'])
+        sketch.count = sketch.zeros + sum(sketch.positive.values()) + \
+            sum(sketch.negative.values())
+        return sketch
+
+
+class SeriesSummary(object):
+    """
+    Summary of the samples of a series
+
+    The time above a threshold is the time between a sample above this threshold and the
+    next sample in time, the value of a check being kept until the next check. The samples
+    must be added in time order, older or newer first, as they are extracted.
+
+    :param accuracy: relative accuracy of the percentiles
+    """
+    __slots__ = ('count', 'minimum', 'maximum', 'total', 'sketch', 'first', 'last',
+                 'warning_time', 'critical_time', 'previous')
+
+    def __init__(self, accuracy=DEFAULT_ACCURACY):
+        self.count = 0
+        self.minimum = self.maximum = None
+        self.total = 0.0
+        self.sketch = QuantileSketch(accuracy)
+        self.first = self.last = None
+        self.warning_time = self.critical_time = 0
+        # Previous sample: timestamp, value, warning, critical
+        self.previous = None
+
+    def add(self, timestamp, value, warning=None, critical=None):
+        # pylint: disable=too-many-arguments
+        """
+        Add a sample to the summary
+
+        :param warning: warning threshold of the sample, None if it has no numeric threshold
+        :param critical: critical threshold of the sample, None if it has no numeric threshold
+        :return: None
+        """
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        self.sketch.add(value)
+        if self.first is None or timestamp < self.first:
+            self.first = timestamp
+        if self.last is None or timestamp > self.last:
+            self.last = timestamp
+
+        sample = (timestamp, value, warning, critical)
+        previous = self.previous
+        self.previous = sample
+        if previous is None or previous[0] == timestamp:
+            return
+        older = previous if previous[0] < timestamp else sample
+        duration = abs(timestamp - previous[0])
+        if older[2] is not None and older[1] > older[2]:
+            self.warning_time += duration
+        if older[3] is not None and older[1] > older[3]:
+            self.critical_time += duration
+
+    def merge(self, other):
+        """
+        Add the samples summarized by another summary, of another time range
+
+        The time between the two time ranges is not counted above the thresholds.
+
+        :param other: SeriesSummary object
+        :return: None
+        """
+        if not other.count:
+            return
+        self.count += other.count
+        self.total += other.total
+        if self.minimum is None or other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if self.maximum is None or other.maximum > self.maximum:
+            self.maximum = other.maximum
+        self.sketch.merge(other.sketch)
+        if self.first is None or other.first < self.first:
+            self.first = other.first
+        if self.last is None or other.last > self.last:
+            self.last = other.last
+        self.warning_time += other.warning_time
+        self.critical_time += other.critical_time
+
+    def percentile(self, percentile):
+        """
+        Get an estimation of a percentile of the samples, within their minimum and maximum
+
+        :param percentile: percentile, between 0 and 100
+        :return: value, or None if there is no sample
+        """
+        value = self.sketch.quantile(percentile / 100.0)
+        if value is None:
+            return None
+        return min(max(value, self.minimum), self.maximum)
+
+    def to_dict(self, percentiles=(50, 95, 99)):
+        """
+        Get the summary statistics
+
+        :param percentiles: estimated percentiles
+        :return: OrderedDict
+        """
+        summary = OrderedDict()
+        summary['count'] = self.count
+        summary['min'] = self.minimum
+        summary['max'] = self.maximum
+        summary['mean'] = self.total / self.count if self.count else None
+        for percentile in percentiles:
+            summary['p%s' % ('%g' % percentile).replace('.', '_')] = \
+                self.percentile(percentile)
+        summary['first'] = self.first
+        summary['last'] = self.last
+        summary['duration'] = self.last - self.first if self.count else 0
+        summary['warning_time'] = self.warning_time
+        summary['critical_time'] = self.critical_time
+        return summary
+
+
+class StreamSummarizer(object):
+    """
+    Summary of the streamed samples, per counter
+
+    The samples of each counter must be streamed in time order, older or newer first.
+
+    :param accuracy: relative accuracy of the percentiles
+    """
+
+    def __init__(self, accuracy=DEFAULT_ACCURACY):
+        self.accuracy = accuracy
+        self.summaries = {}
+
+    def __len__(self):
+        return len(self.summaries)
+
+    def process(self, samples):
+        """
+        Summarize samples
+
+        :param samples: iterable of (host, service, metric, timestamp, value, Metric) samples
+        :return: None
+        """
+        summaries = self.summaries
+        for host, service, name, timestamp, value, metric in samples:
+            if value is None or value != value:
+                continue
+            key = (host, service, name)
+            summary = summaries.get(key)
+            if summary is None:
+                summary = summaries[key] = SeriesSummary(self.accuracy)
+            if metric is None:
+                summary.add(timestamp, value)
+            else:
+                summary.add(timestamp, value, metric.warning, metric.critical)
+
+    def merge(self, other):
+        """
+        Add the summaries of another summarizer
+
+        :param other: StreamSummarizer object
+        :return: None
+        """
+        for key, summary in other.summaries.items():
+            if key in self.summaries:
+                self.summaries[key].merge(summary)
+            else:
+                self.summaries[key] = summary
+
+    def iter_summaries(self):
+        """
+        Iterate over the summaries, sorted by counter
+
+        :return: generator of (host, service, metric, SeriesSummary) tuples
+        """
+        for key in sorted(self.summaries):
+            yield key + (self.summaries[key],)
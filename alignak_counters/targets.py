@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides the resolution of the targeted hosts and services names
+
+The requested names may be exact names, glob patterns (web-*) or regular expressions
+prefixed with re: (re:^web-[0-9]+$). The patterns are matched against the names of the
+host and service collections, which are much smaller than the check result logs, so that
+the check result logs are only searched for exact names.
+"""
+import re
+import json
+import fnmatch
+import logging
+
+logger = logging.getLogger('alignak-backend-counters')
+
+# Prefix of the names which are regular expressions
+REGEX_PREFIX = 're:'
+# Characters of the names which are glob patterns
+GLOB_CHARACTERS = '*?['
+
+
+class NameFilter(object):
+    """
+    Filter of the names matching a list of requested names
+
+    A single plain name matches all the names containing it, as the former $regex search
+    did, whereas a list of plain names only matches these exact names. 'all' matches all
+    the names.
+    """
+
+    def __init__(self, names):
+        self.all = names == ['all']
+        self.names = set()
+        self.patterns = []
+        if self.all:
+            return
+
+        for name in names:
+            if name.startswith(REGEX_PREFIX):
+                self.patterns.append(re.compile(name[len(REGEX_PREFIX):]).search)
+            elif any(character in name for character in GLOB_CHARACTERS):
+                self.patterns.append(re.compile(fnmatch.translate(name)).match)
+            elif len(names) == 1:
+                self.patterns.append(re.compile(re.escape(name)).search)
+            else:
+                self.names.add(name)
+
+    @property
+    def exact(self):
+        """
+        True if the filter only matches exact names, that do not need to be resolved
+        """
+        return not self.all and not self.patterns
+
+    def match(self, name):
+        """
+        Check if a name matches the filter
+
+        :param name: host or service name
+        :return: True if the name matches
+        """
+        if self.all or name in self.names:
+            return True
+        return any(pattern(name) for pattern in self.patterns)
+
+
+def resolve_names(pages, endpoint, name_filter):
+    """
+    Get the names of an host or service collection matching a filter
+
+    :param pages: BackendPages used to fetch the collection
+    :param endpoint: host or service
+    :param name_filter: NameFilter
+    :return: sorted list of the matching names, None if all the names match
+    """
+    if name_filter.all:
+        return None
+    if name_filter.exact:
+        return sorted(name_filter.names)
+
+    names = set()
+    params = {'projection': json.dumps({"name": 1})}
+    for response in pages.get_pages(endpoint, params):
+        for item in response.get('_items', []):
+            if name_filter.match(item['name']):
+                names.add(item['name'])
+    logger.debug("Resolved %d %s names", len(names), endpoint)
+    return sorted(names)
+
+
+def get_batches(names, size):
+    """
+    Split a list of names in batches
+
+    :param names: list of names
+    :param size: maximum number of names per batch
+    :return: list of lists of names
+    """
+    return [names[index:index + size] for index in range(0, len(names), size)]
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module provides the output writers of the extracted counters
+
+* json: one JSON object of the counters per host, service and metric
+* ndjson: one JSON sample per line
+* csv: one sample per line, with a header line
+* binary: packed float64 series with an index, see BinaryWriter
+
+The ndjson and csv writers can write the samples as soon as they are fetched (streaming).
+The json, ndjson and csv writers can write the counters summaries instead of their samples,
+and the samples tagged with their source backend.
+"""
+import sys
+import csv
+import json
+import struct
+from collections import OrderedDict
+
+# Binary format
+BINARY_MAGIC = b'ABCS'
+BINARY_VERSION = 1
+# Magic, version, flags, index offset, series count
+BINARY_HEADER = struct.Struct('<4sHHQQ')
+
+
+def get_bytes(data):
+    """
+    Get the little endian bytes of an array of floats
+
+    :param data: array('d')
+    :return: bytes
+    """
+    if sys.byteorder != 'little':  # pragma: no cover, big endian systems
+        data = data[:]
+        data.byteswap()
+    if hasattr(data, 'tobytes'):
+        return data.tobytes()
+    return data.tostring()
+
+
+def to_bytes(name):
+    """
+    Encode a name as UTF-8, the csv module only writes bytes
+
+    :param name: host, service, metric or source name
+    :return: str
+    """
+    if isinstance(name, unicode):
+        return name.encode('utf-8')
+    return name
+
+
+class Writer(object):
+    """
+    Base class of the output writers
+
+    :param output: file-like object, opened in binary mode if the writer is binary
+    """
+    binary = False
+    streamable = False
+    summarizable = False
+    taggable = False
+
+    def __init__(self, output):
+        self.output = output
+
+    def write_samples(self, samples):
+        """
+        Write samples, only for the streamable writers
+
+        :param samples: iterable of (host, service, metric, timestamp, value, Metric) samples
+        :return: None
+        """
+        raise NotImplementedError()
+
+    def write_counters(self, counters):
+        """
+        Write all the counters series
+
+        :param counters: Counters object
+        :return: None
+        """
+        self.write_samples((host, service, metric, timestamp, value, None)
+                           for host, service, metric, series in counters.iter_series()
+                           for timestamp, value in series)
+
+    def write_tagged_samples(self, samples):
+        """
+        Write samples tagged with their source, only for the taggable writers
+
+        :param samples: iterable of (host, service, metric, timestamp, value, source) samples
+        :return: None
+        """
+        raise NotImplementedError()
+
+    def write_summaries(self, summaries, percentiles):
+        """
+        Write the counters summaries, only for the summarizable writers
+
+        :param summaries: iterable of (host, service, metric, SeriesSummary) tuples
+        :param percentiles: percentiles of the summaries
+        :return: None
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Flush the output, and close it if it is not the standard output
+
+        :return: None
+        """
+        self.output.flush()
+        if self.output not in (sys.stdout, getattr(sys.stdout, 'buffer', None)):
+            self.output.close()
+
+
+class JsonWriter(Writer):  # pylint: disable=abstract-method
+    """
+    Write the counters as one JSON object
+
+    The tagged samples are [timestamp, value, source] lists.
+    """
+    summarizable = True
+    taggable = True
+
+    def write_counters(self, counters):
+        counters.write_json(self.output)
+        self.output.write("\n")
+
+    def write_tagged_samples(self, samples):
+        result = {}
+        for host, service, name, last_check, value, source in samples:
+            result.setdefault(host, {}).setdefault(service, {}).setdefault(name, []).append(
+                [last_check, value, source])
+        self.output.write(json.dumps(result) + "\n")
+
+    def write_summaries(self, summaries, percentiles):
+        result = {}
+        for host, service, metric, summary in summaries:
+            result.setdefault(host, {}).setdefault(service, {})[metric] = \
+                summary.to_dict(percentiles)
+        self.output.write(json.dumps(result) + "\n")
+
+
+class NdjsonWriter(Writer):
+    """
+    Write the samples as JSON objects, one per line
+    """
+    streamable = True
+    summarizable = True
+    taggable = True
+
+    def write_samples(self, samples):
+        """
+        Write samples and flush the output
+
+        :param samples: iterable of (host, service, metric, timestamp, value, Metric) samples
+        :return: None
+        """
+        for host, service, name, last_check, value, _ in samples:
+            self.output.write(json.dumps({
+                "host": host, "service": service, "metric": name,
+                "last_check": last_check, "value": value
+            }) + "\n")
+        self.output.flush()
+
+    def write_tagged_samples(self, samples):
+        for host, service, name, last_check, value, source in samples:
+            self.output.write(json.dumps({
+                "host": host, "service": service, "metric": name,
+                "last_check": last_check, "value": value, "source": source
+            }) + "\n")
+        self.output.flush()
+
+    def write_summaries(self, summaries, percentiles):
+        for host, service, metric, summary in summaries:
+            line = OrderedDict((("host", host), ("service", service), ("metric", metric)))
+            line.update(summary.to_dict(percentiles))
+            self.output.write(json.dumps(line) + "\n")
+
+
+class CsvWriter(Writer):
+    """
+    Write the samples as CSV lines: host, service, metric, timestamp, value
+
+    The summaries are written as CSV lines: host, service, metric and the summary
+    statistics, and the tagged samples with a last source column. The header line is
+    written before the first line.
+    """
+    streamable = True
+    summarizable = True
+    taggable = True
+
+    def __init__(self, output):
+        super(CsvWriter, self).__init__(output)
+        self.writer = csv.writer(output, lineterminator='\n')
+        self.header = False
+
+    def write_header(self, header):
+        """
+        Write the header line, if it is not yet written
+
+        :return: None
+        """
+        if not self.header:
+            self.writer.writerow(header)
+            self.header = True
+
+    def write_samples(self, samples):
+        """
+        Write samples and flush the output
+
+        :param samples: iterable of (host, service, metric, timestamp, value, Metric) samples
+        :return: None
+        """
+        self.write_header(('host', 'service', 'metric', 'timestamp', 'value'))
+        self.writer.writerows((to_bytes(host), to_bytes(service), to_bytes(name), last_check,
+                               '' if value is None else value)
+                              for host, service, name, last_check, value, _ in samples)
+        self.output.flush()
+
+    def write_tagged_samples(self, samples):
+        self.write_header(('host', 'service', 'metric', 'timestamp', 'value', 'source'))
+        self.writer.writerows((to_bytes(host), to_bytes(service), to_bytes(name), last_check,
+                               '' if value is None else value, to_bytes(source))
+                              for host, service, name, last_check, value, source in samples)
+        self.output.flush()
+
+    def write_summaries(self, summaries, percentiles):
+        for host, service, metric, summary in summaries:
+            statistics = summary.to_dict(percentiles)
+            self.write_header(('host', 'service', 'metric') + tuple(statistics))
+            self.writer.writerow((to_bytes(host), to_bytes(service), to_bytes(metric)) + tuple(
+                '' if value is None else value for value in statistics.values()))
+
+    def close(self):
+        # An empty extraction is only the samples header
+        self.write_header(('host', 'service', 'metric', 'timestamp', 'value'))
+        super(CsvWriter, self).close()
+
+
+class BinaryWriter(Writer):  # pylint: disable=abstract-method
+    """
+    Write the counters as packed binary series
+
+    The file starts with a header: magic (ABCS), version, flags, index offset and series
+    count (struct '<4sHHQQ'). The series follow, each one being a block of its float64
+    timestamps followed by a block of its float64 values, little endian, sorted by
+    timestamp, a missing value being NaN. The index ends the file: a JSON list of
+    [host, service, metric, offset, count, unit, maximum] entries, offset being the
+    position of the series timestamps block in the file.
+
+    All the blocks are aligned on 8 bytes, so that they may be memory-mapped as arrays.
+    """
+    binary = True
+
+    def write_counters(self, counters):
+        index = []
+        offset = BINARY_HEADER.size
+        for host, service, metric, series in counters.iter_series():
+            series.sort()
+            index.append([host, service, metric, offset, len(series),
+                          series.uom, series.maximum])
+            offset += 16 * len(series)
+
+        self.output.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0,
+                                             offset, len(index)))
+        for _, _, _, series in counters.iter_series():
+            self.output.write(get_bytes(series.timestamps))
+            self.output.write(get_bytes(series.values))
+        self.output.write(json.dumps(index).encode('utf-8'))
+
+
+WRITERS = {
+    'json': JsonWriter,
+    'ndjson': NdjsonWriter,
+    'csv': CsvWriter,
+    'binary': BinaryWriter
+}
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Backend fetching benchmark
+
+Fetches and parses all the check result logs of a local fake backend which delays each
+request, first sequentially, then with concurrent workers, then with concurrent workers
+sharing a pool of as many keep-alive connections, and finally from the local responses
+cache::
+
+    python benchmarks/bench_backend.py [items] [latency]
+"""
+from __future__ import print_function
+
+import sys
+import time
+import shutil
+import tempfile
+
+from alignak_backend_client.client import Backend
+
+from alignak_counters.cache import CachedBackend, PageCache
+from alignak_counters.pagination import BackendPages
+from alignak_counters.perfdata import PerfDatasCache
+from alignak_counters.session import PooledBackend
+
+from fake_backend import FakeBackend
+
+
+def make_items(count):
+    """Build check result logs"""
+    return [{'host_name': 'host-%d' % (index % 10), 'service_name': 'service-%d' % (index % 7),
+             'last_check': 1464739200 + index, 'state': 'OK', 'state_type': 'HARD',
+             'perf_data': "load1=%d.%d;5;10;0 'mem used'=%d%%;80;90 requests=%dc"
+                          % (index % 7, index % 10, index % 100, index * 3)}
+            for index in range(count)]
+
+
+def fetch(backend, workers, page_size):
+    """Fetch and parse all the check result logs"""
+    perfdatas = PerfDatasCache()
+    pages = BackendPages(backend, workers=workers, page_size=page_size)
+    count = 0
+    for result in pages.get_pages('logcheckresult', {'sort': '-last_check'}):
+        for item in result['_items']:
+            count += len(perfdatas.get(item['perf_data']))
+    return count
+
+
+def main():
+    """Run the benchmark"""
+    items_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    page_size = 250
+    workers = 8
+
+    server = FakeBackend({'logcheckresult': make_items(items_count)}, latency=latency).start()
+    print("%d items, %d pages, %.0f ms latency per request"
+          % (items_count, (items_count + page_size - 1) // page_size, latency * 1000))
+
+    results = {}
+    for name, backend_class, count in (('sequential', Backend, 1),
+                                       ('workers', Backend, workers),
+                                       ('pooled', PooledBackend, workers)):
+        if backend_class is PooledBackend:
+            backend = PooledBackend(server.url, connections=count)
+        else:
+            backend = Backend(server.url)
+        backend.login('admin', 'admin')
+        server.reset_counters()
+
+        start = time.time()
+        metrics = fetch(backend, count, page_size)
+        results[name] = time.time() - start
+        print("%-10s: %d workers, %6.2f seconds, %d requests, %d new connections, %d metrics"
+              % (name, count, results[name], server.requests, server.connections, metrics))
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        backend = CachedBackend(PooledBackend(server.url, connections=workers),
+                                PageCache(cache_dir))
+        backend.login('admin', 'admin')
+        fetch(backend, workers, page_size)
+        server.reset_counters()
+
+        start = time.time()
+        metrics = fetch(backend, workers, page_size)
+        results['cached'] = time.time() - start
+        print("%-10s: %d workers, %6.2f seconds, %d requests, %d new connections, %d metrics"
+              % ('cached', workers, results['cached'], server.requests, server.connections,
+                 metrics))
+    finally:
+        shutil.rmtree(cache_dir)
+
+    print("Speedup: %.1fx with workers, %.1fx with pooled workers, %.1fx from the cache"
+          % (results['sequential'] / results['workers'],
+             results['sequential'] / results['pooled'],
+             results['sequential'] / results['cached']))
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Performance data parsing micro-benchmark
+
+Checks that the PerfDatas parser gives the same metrics as the reference parser on a
+conformance corpus, then compares their parsing speed, including when only one metric
+is targeted::
+
+    python benchmarks/bench_perfdata.py [count]
+"""
+from __future__ import print_function
+
+import re
+import sys
+import random
+import timeit
+
+from alignak_counters.perfdata import PerfDatas
+
+from corpus import random_perfdata
+
+# Reference parser, as implemented before the single pass parser
+REFERENCE_SPLIT_PATTERN = re.compile(r'([^=]+=\S+)')
+REFERENCE_METRIC_PATTERN = \
+    re.compile(
+        r"^([^=]+)=([\d\.\-\+eE]+)([\w\/%]*)"
+        r";?([\d\.\-\+eE:~@]+)?;?([\d\.\-\+eE:~@]+)?;?([\d\.\-\+eE]+)?;?([\d\.\-\+eE]+)?;?\s*"
+    )
+
+
+def reference_int_or_float(val):
+    """Reference guess_int_or_float"""
+    try:
+        integer = int(float(val))
+        flt = float(val)
+        if integer == flt:
+            return integer
+        return flt
+    except (ValueError, TypeError):
+        return None
+
+
+class ReferenceMetric:  # pylint: disable=old-style-class, too-few-public-methods
+    """Reference Metric"""
+    def __init__(self, string):
+        self.name = self.value = self.uom = \
+            self.warning = self.critical = self.min = self.max = None
+        string = string.strip()
+        matches = REFERENCE_METRIC_PATTERN.match(string)
+        if matches:
+            self.name = matches.group(1).replace("'", "")
+            self.value = reference_int_or_float(matches.group(2))
+            self.uom = matches.group(3)
+            self.warning = reference_int_or_float(matches.group(4))
+            self.critical = reference_int_or_float(matches.group(5))
+            self.min = reference_int_or_float(matches.group(6))
+            self.max = reference_int_or_float(matches.group(7))
+            if self.uom == '%':
+                self.min = 0
+                self.max = 100
+
+
+class ReferencePerfDatas:  # pylint: disable=old-style-class, too-few-public-methods
+    """Reference PerfDatas"""
+    def __init__(self, string):
+        string = string or ''
+        elts = REFERENCE_SPLIT_PATTERN.findall(string)
+        elts = [e for e in elts if e != '']
+        self.metrics = {}
+        for elem in elts:
+            metric = ReferenceMetric(elem)
+            if metric.name is not None:
+                self.metrics[metric.name] = metric
+
+
+def get_fields(perfdatas):
+    """Get a dict of metric name: metric fields tuple"""
+    return dict((metric.name, (metric.value, metric.uom, metric.warning, metric.critical,
+                               metric.min, metric.max))
+                for metric in perfdatas.metrics.values())
+
+
+CONFORMANCE_CORPUS = [
+    None, '', ' ', '=', '==', 'a=', 'a= b=1', ' =5', "''=1", 'a=1', 'a =1', ' a=1',
+    'a=1 b=2', 'a=1  b=2', 'a=1\tb=2', 'a=1\nb=2', 'a=1;2;3;4;5', 'a=1;;;;', 'a=1;;3;;5',
+    'a=1.0', 'a=1.5', 'a=-1', 'a=+1', 'a=1e3', 'a=1E-3', 'a=1.2.3', 'a=-', 'a=e', 'a=..',
+    'a=abc', 'a=1abc', 'a=1%', 'a=1%;80;90', 'a=1%;80;90;5;50', 'a=1s;@10:20;~:30',
+    'a=1c', 'a=1KB;;;0;1024', 'a=1/s', 'a=1B=2', 'a=1 a=2', "'load 1'=0.5",
+    "'a b c'=1;2;3 'd e'=4", "a'b=1", 'a=1;2;3;4;5;6;7', 'a=1;2:3;4', 'a=;1',
+    'a=1 garbage b=2', 'garbage', 'a=1 =2 b=3', u'a=1\xa0b=2', u'\xa0a=1', u'a=1\xa0',
+    'rta=0.047000ms;100.000000;500.000000;0.000000 pl=0%;20;60;0',
+    'users=2;5;10;0 load1=0.050;15.000;30.000;0; load5=0.030;10.000;25.000;0;',
+    "'C:\\ Used Space'=10.5Gb;40.0;45.0;0.00;50.0 'D:\\ Used Space'=2Gb",
+]
+
+
+def check_conformance(corpus, names):
+    """Check that both parsers give the same metrics, raise an AssertionError else
+
+    The targeted metrics parsing must give the same metrics as the full parsing
+    """
+    for string in corpus:
+        expected = get_fields(ReferencePerfDatas(string))
+        got = get_fields(PerfDatas(string))
+        assert got == expected, "%r: %s != %s" % (string, got, expected)
+
+        expected = dict((name, fields) for name, fields in expected.items() if name in names)
+        got = get_fields(PerfDatas(string, names))
+        assert got == expected, "%r, %s: %s != %s" % (string, names, got, expected)
+
+
+def main():
+    """Run the benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    rand = random.Random(42)
+    corpus = [random_perfdata(rand, rand.choice([1, 2, 5, 10, 50])) for _ in range(count)]
+    check_conformance(CONFORMANCE_CORPUS + corpus, set(['a', 'b', 'm1', 'metric 3', 'load 1']))
+    print("Conformance: %d performance data strings parsed identically"
+          % (len(CONFORMANCE_CORPUS) + len(corpus)))
+
+    results = {}
+    for name, function in (('reference', ReferencePerfDatas), ('perfdatas', PerfDatas)):
+        duration = min(timeit.repeat(lambda: [function(string) for string in corpus],
+                                     number=1, repeat=3))
+        results[name] = count / duration
+        print("%-10s: %10.0f parses/second" % (name, results[name]))
+    print("Speedup: %.2fx" % (results['perfdatas'] / results['reference']))
+
+    names = set(['m1'])
+    duration = min(timeit.repeat(lambda: [PerfDatas(string, names) for string in corpus],
+                                 number=1, repeat=3))
+    print("%-10s: %10.0f parses/second, only parsing one metric"
+          % ('targeted', count / duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Sinks benchmark
+
+Pushes samples by batches to the Graphite and InfluxDB sinks, each one writing to a local
+socket listener which counts the received lines::
+
+    python benchmarks/bench_sinks.py [samples] [batch]
+"""
+from __future__ import print_function
+
+import sys
+import time
+import socket
+import threading
+
+from alignak_counters.sinks import GraphiteSink, InfluxSink
+
+
+class Listener(object):
+    """Local TCP or UDP listener counting the received lines"""
+
+    def __init__(self, udp=False):
+        self.udp = udp
+        self.lines = 0
+        if udp:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        else:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.port = self.socket.getsockname()[1]
+        if not udp:
+            self.socket.listen(1)
+        self.thread = threading.Thread(target=self.receive)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def receive(self):
+        """Count the lines until the connection is closed"""
+        connection = self.socket
+        if not self.udp:
+            connection, _ = self.socket.accept()
+        while True:
+            data = connection.recv(65536)
+            if not data:
+                break
+            self.lines += data.count(b'\n')
+
+    def wait(self, count, timeout=10):
+        """Wait until some lines are received"""
+        end = time.time() + timeout
+        while self.lines < count and time.time() < end:
+            time.sleep(0.01)
+        return self.lines
+
+
+def main():
+    """Run the benchmark"""
+    samples_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    samples = [('host-%d' % (index % 50), 'service %d' % (index % 10), 'load1',
+                1464739200 + index, index * 0.5, None) for index in range(samples_count)]
+
+    for name, sink_class, udp in (('graphite', GraphiteSink, False),
+                                  ('influx', InfluxSink, False),
+                                  ('influx-udp', InfluxSink, True)):
+        listener = Listener(udp)
+        sink = sink_class('127.0.0.1', listener.port, udp=udp)
+        start = time.time()
+        for index in range(0, samples_count, batch_size):
+            sink.write(samples[index:index + batch_size])
+        received = listener.wait(samples_count, timeout=2 if udp else 10)
+        duration = time.time() - start
+        sink.close()
+        print("%-10s: %d samples pushed in %.3fs (%d samples/s), %d received"
+              % (name, samples_count, duration, samples_count / duration, received))
+
+
+if __name__ == "__main__":
+    main()
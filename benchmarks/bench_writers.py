@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Output formats benchmark
+
+Writes the same counters in each output format, then loads them back, and reports the
+file sizes and the write and load durations. Then reads the last day of one series, at
+most its second half, from the binary export with the memory-mapped reader::
+
+    python benchmarks/bench_writers.py [series] [samples]
+"""
+from __future__ import print_function
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import tempfile
+from array import array
+
+from alignak_counters.reader import CountersReader
+from alignak_counters.series import Counters
+from alignak_counters.writers import WRITERS, BINARY_HEADER
+
+
+def make_counters(series_count, samples_count):
+    """Build counters with float values sampled every minute"""
+    counters = Counters()
+    for index in range(series_count):
+        value = random.uniform(0, 100)
+        for sample in range(samples_count):
+            value += random.uniform(-1, 1)
+            counters.add('host-%d' % (index // 10), 'service-%d' % (index % 10), 'metric',
+                         1464739200 + 60 * sample, round(value, 3))
+    return counters
+
+
+def load_json(filename):
+    """Load a json export"""
+    with open(filename) as export:
+        return json.load(export)
+
+
+def load_ndjson(filename):
+    """Load a ndjson export"""
+    with open(filename) as export:
+        return [json.loads(line) for line in export]
+
+
+def load_csv(filename):
+    """Load a csv export"""
+    with open(filename) as export:
+        reader = csv.reader(export)
+        next(reader)
+        return [(host, service, metric, float(timestamp), float(value))
+                for host, service, metric, timestamp, value in reader]
+
+
+def load_binary(filename):
+    """Load a binary export"""
+    with open(filename, 'rb') as export:
+        data = export.read()
+    _, _, _, index_offset, _ = BINARY_HEADER.unpack_from(data)
+    series = {}
+    for host, service, metric, offset, count, _, _ in json.loads(data[index_offset:]):
+        timestamps = array('d')
+        values = array('d')
+        timestamps.fromstring(data[offset:offset + 8 * count])
+        values.fromstring(data[offset + 8 * count:offset + 16 * count])
+        series[(host, service, metric)] = (timestamps, values)
+    return series
+
+
+LOADERS = {'json': load_json, 'ndjson': load_ndjson, 'csv': load_csv, 'binary': load_binary}
+
+
+def main():
+    """Run the benchmark"""
+    series_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    samples_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    counters = make_counters(series_count, samples_count)
+    print("%d series of %d samples" % (series_count, samples_count))
+
+    directory = tempfile.mkdtemp()
+    sizes = {}
+    for name in ('json', 'ndjson', 'csv', 'binary'):
+        filename = os.path.join(directory, 'counters.%s' % name)
+        writer_class = WRITERS[name]
+
+        start = time.time()
+        writer = writer_class(open(filename, 'wb' if writer_class.binary else 'w'))
+        writer.write_counters(counters)
+        writer.close()
+        write_duration = time.time() - start
+
+        start = time.time()
+        LOADERS[name](filename)
+        load_duration = time.time() - start
+
+        sizes[name] = os.path.getsize(filename)
+        print("%-7s: %10d bytes (%4.1fx smaller than json), written in %6.3fs, loaded in %6.3fs"
+              % (name, sizes[name], float(sizes['json']) / sizes[name],
+                 write_duration, load_duration))
+        if name != 'binary':
+            os.remove(filename)
+
+    timestamps = counters.get('host-0', 'service-0', 'metric').timestamps
+    first = max(timestamps[len(timestamps) // 2], timestamps[-1] - 86400)
+    start = time.time()
+    with CountersReader(filename) as reader:
+        series = reader.get('host-0', 'service-0', 'metric', start=first, end=timestamps[-1])
+        count = len(series)
+        del series
+    duration = time.time() - start
+    assert count, "No sample read from the binary export"
+    print("reader : %d of %d samples of one series read in %.6fs"
+          % (count, len(timestamps), duration))
+    os.remove(filename)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Synthetic corpus of performance data and check result logs, used by the benchmarks
+
+The generated data is reproducible: it only depends on the random seed.
+"""
+import random
+
+# Units, thresholds and malformed entries found in the performance data
+UNITS = ['', '', '%', 's', 'ms', 'B', 'KB', 'c', '/s']
+THRESHOLDS = ['', ';10;20', ';10;20;0;100', ';@5:10;~:20', ';;;0;', ';']
+MALFORMED = ['garbage', '=1', 'a=', "'unclosed=1", 'a=1.2.3', 'a=U', 'a==1']
+
+
+def random_perfdata(rand, metrics_count):
+    """Build a random performance data string"""
+    elts = []
+    for index in range(metrics_count):
+        value = rand.choice(['%d' % rand.randint(-1000, 100000),
+                             '%.3f' % rand.uniform(-1000, 1000),
+                             '%de%d' % (rand.randint(1, 9), rand.randint(-5, 5)),
+                             'U', '', '1.2.3'])
+        uom = rand.choice(UNITS)
+        thresholds = rand.choice(THRESHOLDS)
+        name = rand.choice(['m%d' % index, "'metric %d'" % index, 'm%d' % (index // 2)])
+        elts.append('%s=%s%s%s' % (name, value, uom, thresholds))
+    return rand.choice([' ', '  ', '\t']).join(elts)
+
+
+def generate_perfdata(count, seed=42, metrics_counts=(1, 2, 5, 10, 50), malformed=0.05):
+    """
+    Build a list of performance data strings
+
+    :param count: number of strings
+    :param seed: random seed
+    :param metrics_counts: numbers of metrics per string, randomly chosen
+    :param malformed: ratio of the strings with a malformed entry
+    :return: list of strings
+    """
+    rand = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        string = random_perfdata(rand, rand.choice(metrics_counts))
+        if rand.random() < malformed:
+            string = '%s %s' % (string, rand.choice(MALFORMED))
+        corpus.append(string)
+    return corpus
+
+
+def generate_logs(count, hosts=50, services=10, seed=42, interval=300, malformed=0.01):
+    """
+    Build a list of check result logs, as stored in the backend logcheckresult endpoint
+
+    Each service of each host is checked every interval seconds and its performance data
+    has the same metrics, with values changing over time.
+
+    :param count: number of logs
+    :param hosts: number of hosts
+    :param services: number of services per host
+    :param seed: random seed
+    :param interval: checks interval, in seconds
+    :param malformed: ratio of the logs with no or malformed performance data
+    :return: list of dicts
+    """
+    rand = random.Random(seed)
+    logs = []
+    start = 1464739200
+    for index in range(count):
+        check = index // (hosts * services)
+        host = index % hosts
+        service = (index // hosts) % services
+        if rand.random() < malformed:
+            perf_data = rand.choice([None, '', rand.choice(MALFORMED)])
+        else:
+            perf_data = ("load1=%.2f;5;10;0 'mem used'=%d%%;80;90 requests=%dc"
+                         " rta=%.3fms;100;500;0 pl=%d%%;20;60;0"
+                         % (rand.uniform(0, 8), rand.randint(0, 100), check * 97 + service,
+                            rand.uniform(0, 200), rand.choice([0, 0, 0, 10, 100])))
+        logs.append({
+            'host_name': 'host-%d' % host, 'service_name': 'service-%d' % service,
+            'last_check': start + check * interval + service, 'state': 'OK',
+            'state_type': 'HARD', 'perf_data': perf_data
+        })
+    return logs
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Local stand-in for the Alignak backend, used by the benchmarks
+
+It serves the login endpoint and paginated, Eve like, responses for the logcheckresult
+endpoint from a list of check result logs held in memory. Each request is delayed to
+simulate the network and backend latency, and the opened connections are counted.
+"""
+import re
+import json
+import time
+import threading
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+except ImportError:  # pragma: no cover, Python 3
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+
+TOKEN = '1234567890'
+
+
+def match_condition(value, condition):
+    """Check if a value matches a MongoDB like condition"""
+    if not isinstance(condition, dict):
+        return value == condition
+    for operator, operand in condition.items():
+        if operator == '$in' and value not in operand:
+            return False
+        if operator == '$regex' and not re.search(operand, value or ''):
+            return False
+        if operator == '$gt' and not value > operand:
+            return False
+        if operator == '$gte' and not value >= operand:
+            return False
+        if operator == '$lt' and not value < operand:
+            return False
+        if operator == '$lte' and not value <= operand:
+            return False
+    return True
+
+
+def match_where(item, where):
+    """Check if an item matches a MongoDB like where clause"""
+    for field, condition in where.items():
+        if field == '$and':
+            if not all(match_where(item, clause) for clause in condition):
+                return False
+        elif field == '$or':
+            if not any(match_where(item, clause) for clause in condition):
+                return False
+        elif not match_condition(item.get(field), condition):
+            return False
+    return True
+
+
+class FakeBackendHandler(BaseHTTPRequestHandler):
+    """
+    Request handler of the fake backend
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Do not log the requests"""
+        pass
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def send_json(self, status, data):
+        """Send a JSON response"""
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Login"""
+        time.sleep(self.server.latency)
+        length = int(self.headers.get('Content-Length') or 0)
+        credentials = json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+        if credentials.get('username') != 'admin' or credentials.get('password') != 'admin':
+            self.send_json(401, {'_status': 'ERR', '_error': {'code': 401,
+                                                              'message': 'Access denied'}})
+            return
+        self.send_json(200, {'token': TOKEN})
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Get the items of an endpoint"""
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.requests += 1
+        url = urlparse(self.path)
+        endpoint = url.path.strip('/')
+        if endpoint not in self.server.endpoints:
+            self.send_json(404, {'_status': 'ERR', '_error': {'code': 404,
+                                                              'message': 'Not found'}})
+            return
+        params = dict((key, values[0]) for key, values in parse_qs(url.query).items())
+
+        items = self.server.endpoints[endpoint]
+        if 'where' in params:
+            where = json.loads(params['where'])
+            items = [item for item in items if match_where(item, where)]
+        if 'sort' in params:
+            field = params['sort'].lstrip('-')
+            items = sorted(items, key=lambda item: item.get(field),
+                           reverse=params['sort'].startswith('-'))
+
+        max_results = min(int(params.get('max_results', 25)), self.server.pagination_limit)
+        page = int(params.get('page', 1))
+        links = {}
+        if page * max_results < len(items):
+            links['next'] = {'href': '%s?page=%d' % (endpoint, page + 1), 'title': 'next page'}
+        self.send_json(200, {
+            '_items': items[(page - 1) * max_results:page * max_results],
+            '_meta': {'page': page, 'max_results': max_results, 'total': len(items)},
+            '_links': links
+        })
+
+
+class FakeBackend(ThreadingMixIn, HTTPServer):
+    """
+    Fake backend HTTP server, running in a thread
+
+    :param endpoints: dict of the items of each endpoint
+    :param latency: delay of each request, in seconds
+    """
+    daemon_threads = True
+
+    def __init__(self, endpoints, latency=0.0, pagination_limit=5000, port=0):
+        HTTPServer.__init__(self, ('127.0.0.1', port), FakeBackendHandler)
+        self.endpoints = endpoints
+        self.latency = latency
+        self.pagination_limit = pagination_limit
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.thread = None
+
+    @property
+    def url(self):
+        """Backend root URL"""
+        return 'http://%s:%d' % self.server_address
+
+    def start(self):
+        """Serve the requests in a thread"""
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving"""
+        self.shutdown()
+        self.server_close()
+
+    def reset_counters(self):
+        """Reset the connections and requests counters"""
+        with self.lock:
+            self.connections = 0
+            self.requests = 0
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Import time budget of the command line::
+
+    Usage:
+        import_budget.py [--budget=seconds] [--runs=count]
+
+    Options:
+        --budget seconds        Maximum import duration of the command line [default: 0.1]
+        --runs count            Imports measured, the fastest one is kept [default: 5]
+
+Imports the command line module in fresh processes and fails if its fastest import is
+longer than the budget, or if it imports a module only needed once the extraction is
+started: the backend client and requests, numpy, dateutil or multiprocessing. These
+modules are imported where they are used, so that --help, --version and the parameters
+errors are fast.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import json
+import subprocess
+
+from docopt import docopt
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported with the command line module
+HEAVY_MODULES = ['alignak_backend_client', 'requests', 'numpy', 'dateutil', 'multiprocessing']
+
+MEASURE = """
+import sys, json, time
+start = time.time()
+import alignak_counters.alignak_backend_counters
+duration = time.time() - start
+print(json.dumps({'duration': duration, 'modules': len(sys.modules),
+                  'heavy': sorted(name for name in %r if name in sys.modules)}))
+""" % HEAVY_MODULES
+
+
+def measure_import():
+    """
+    Import the command line module in a fresh process
+
+    :return: dict with the import duration, the count of loaded modules and the loaded
+    heavy modules
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([BASE_PATH, env.get('PYTHONPATH', '')])
+    output = subprocess.check_output([sys.executable, '-c', MEASURE], env=env)
+    return json.loads(output.decode('utf-8'))
+
+
+def main():
+    """Check the import time budget"""
+    args = docopt(__doc__)
+    budget = float(args['--budget'])
+    results = [measure_import() for _ in range(int(args['--runs']))]
+    best = min(results, key=lambda result: result['duration'])
+    print("Command line import: %.1fms, %d modules (budget %.1fms)"
+          % (1000 * best['duration'], best['modules'], 1000 * budget))
+
+    failed = False
+    if best['heavy']:
+        print("Modules imported too early: %s" % ', '.join(best['heavy']))
+        failed = True
+    if best['duration'] > budget:
+        print("The import time budget is exceeded")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2016: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak Backend Import.
+#
+# Alignak Backend Import is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak Backend Import is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak Backend Import.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Benchmark suite of the counters extraction::
+
+    Usage:
+        run_benchmarks.py [--quick] [--logs=count] [--strings=count] [--latency=seconds]
+                          [--json=file] [--compare=file]
+
+    Options:
+        --quick                 Small corpus, to check that nothing is broken
+        --logs count            Check result logs served by the fake backend [default: 50000]
+        --strings count         Performance data strings parsed [default: 50000]
+        --latency seconds       Latency of each fake backend request [default: 0.005]
+        --json file             Write the results to this file, as JSON
+        --compare file          Compare the results with the ones of a previous run
+
+The parsing benchmark parses a synthetic performance data corpus. The extraction
+benchmarks run alignak_backend_counters against a local fake backend, each one in its own
+process, and measure its duration, time to first output and peak memory. The startup
+benchmarks measure the fastest cold start of the command line, with no extraction. All the
+results are printed, and written as JSON to compare them between releases.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import subprocess
+
+from docopt import docopt
+
+from alignak_counters import __version__
+from alignak_counters.perfdata import PerfDatas
+
+from corpus import generate_logs, generate_perfdata
+from fake_backend import FakeBackend
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Extraction benchmarks: name, command line parameters, output format
+EXTRACTIONS = [
+    ('extract-json', [], 'json'),
+    ('extract-stream', ['--stream'], 'ndjson'),
+    ('extract-stream-parse-workers', ['--stream', '--parse-workers', '2'], 'ndjson'),
+    ('extract-rate-aggregate', ['--rate', '--aggregate', 'avg', '--bucket', '3600'], 'json'),
+]
+
+# Startup benchmarks: name, command line parameters
+STARTUPS = [
+    ('startup-help', ['-h']),
+    ('startup-version', ['-V']),
+]
+
+
+def get_rss_mb(rusage):
+    """Get the peak RSS of a resource usage, in megabytes"""
+    if sys.platform == 'darwin':  # pragma: no cover, bytes on macOS
+        return rusage.ru_maxrss / 1024.0 / 1024.0
+    return rusage.ru_maxrss / 1024.0
+
+
+def count_samples(output, output_format):
+    """Count the samples of an extraction output"""
+    if output_format == 'ndjson':
+        return output.count(b'\n')
+    counters = json.loads(output.decode('utf-8'))
+    return sum(len(samples) for services in counters.values()
+               for metrics in services.values() for samples in metrics.values())
+
+
+def bench_parsing(count):
+    """
+    Parse a performance data corpus, all the metrics, then only one metric
+
+    :return: dict of results per benchmark
+    """
+    corpus = generate_perfdata(count)
+    results = {}
+    for name, names in (('parse-full', None), ('parse-targeted', set(['m1']))):
+        start = time.time()
+        metrics = 0
+        for string in corpus:
+            metrics += len(PerfDatas(string, names))
+        duration = time.time() - start
+        results[name] = {
+            'rows': count, 'metrics': metrics, 'duration': duration,
+            'rows_per_second': count / duration, 'metrics_per_second': metrics / duration,
+            'peak_rss_mb': get_rss_mb(resource.getrusage(resource.RUSAGE_SELF))
+        }
+    return results
+
+
+def get_env():
+    """Get the environment of the benchmarked processes"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([BASE_PATH, env.get('PYTHONPATH', '')])
+    return env
+
+
+def bench_startup(parameters, runs=5):
+    """
+    Run the command line several times, and keep its fastest run
+
+    :return: dict of results
+    """
+    command = [sys.executable, '-m', 'alignak_counters.alignak_backend_counters'] + parameters
+    durations = []
+    with open(os.devnull, 'w') as devnull:
+        for _ in range(runs):
+            start = time.time()
+            process = subprocess.Popen(command, stdout=devnull, stderr=devnull, env=get_env())
+            _, status, rusage = os.wait4(process.pid, 0)
+            durations.append(time.time() - start)
+            if status:
+                raise RuntimeError("%s failed with status %d" % (' '.join(command), status))
+    return {'runs': runs, 'duration': min(durations), 'peak_rss_mb': get_rss_mb(rusage)}
+
+
+def bench_extraction(url, logs_count, parameters, output_format):
+    """
+    Run an extraction in its own process
+
+    :return: dict of results
+    """
+    command = [sys.executable, '-m', 'alignak_counters.alignak_backend_counters',
+               '-b', url, '--no-cache'] + parameters
+    with open(os.devnull, 'w') as devnull:
+        start = time.time()
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=devnull, env=get_env())
+        first_output = None
+        chunks = []
+        while True:
+            chunk = os.read(process.stdout.fileno(), 65536)
+            if not chunk:
+                break
+            if first_output is None:
+                first_output = time.time() - start
+            chunks.append(chunk)
+        _, status, rusage = os.wait4(process.pid, 0)
+        duration = time.time() - start
+    if status:
+        raise RuntimeError("%s failed with status %d" % (' '.join(command), status))
+
+    metrics = count_samples(b''.join(chunks), output_format)
+    return {
+        'rows': logs_count, 'metrics': metrics, 'duration': duration,
+        'rows_per_second': logs_count / duration, 'metrics_per_second': metrics / duration,
+        'time_to_first_output': first_output, 'peak_rss_mb': get_rss_mb(rusage)
+    }
+
+
+def main():
+    """Run the benchmarks"""
+    args = docopt(__doc__)
+    logs_count = int(args['--logs'])
+    strings_count = int(args['--strings'])
+    if args['--quick']:
+        logs_count = strings_count = 2000
+
+    results = bench_parsing(strings_count)
+    for name, parameters in STARTUPS:
+        results[name] = bench_startup(parameters)
+
+    server = FakeBackend({'logcheckresult': generate_logs(logs_count)},
+                         latency=float(args['--latency'])).start()
+    try:
+        for name, parameters, output_format in EXTRACTIONS:
+            results[name] = bench_extraction(server.url, logs_count, parameters,
+                                             output_format)
+    finally:
+        server.stop()
+
+    previous = {}
+    if args['--compare']:
+        with open(args['--compare']) as previous_file:
+            previous = json.load(previous_file)['results']
+
+    print("%-30s %12s %14s %10s %12s %10s %10s" % ('benchmark', 'rows/s', 'metrics/s',
+                                                  'duration', 'first output', 'peak RSS',
+                                                  'vs. prev.' if previous else ''))
+    for name in sorted(results):
+        result = results[name]
+        first_output = result.get('time_to_first_output')
+        change = ''
+        if 'rows_per_second' not in result:
+            # Startup benchmark, compared on its duration as there are no rows
+            if name in previous:
+                change = '%+.1f%%' % (100.0 * result['duration'] /
+                                      previous[name]['duration'] - 100.0)
+            print("%-30s %12s %14s %9.3fs %12s %8.1fMB %10s"
+                  % (name, '-', '-', result['duration'], '-', result['peak_rss_mb'], change))
+            continue
+        if name in previous:
+            change = '%+.1f%%' % (100.0 * result['rows_per_second'] /
+                                  previous[name]['rows_per_second'] - 100.0)
+        print("%-30s %12.0f %14.0f %9.3fs %12s %8.1fMB %10s"
+              % (name, result['rows_per_second'], result['metrics_per_second'],
+                 result['duration'], '-' if first_output is None else '%.3fs' % first_output,
+                 result['peak_rss_mb'], change))
+
+    if args['--json']:
+        with open(args['--json'], 'w') as results_file:
+            json.dump({
+                'version': __version__,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'date': int(time.time()),
+                'parameters': {'logs': logs_count, 'strings': strings_count,
+                               'latency': float(args['--latency'])},
+                'results': results
+            }, results_file, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
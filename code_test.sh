@@ -39,3 +39,15 @@ echo 'tests ...'
 #cd test
 #nosetests -xv --process-restartworker --processes=1 --process-timeout=300 test*.py
 #cd ..
+echo 'import budget ...'
+python benchmarks/import_budget.py
+if [ $? -ne 0 ]; then
+    echo "import budget exceeded"
+    exit
+fi
+echo 'benchmarks ...'
+python benchmarks/run_benchmarks.py --quick --json benchmarks/bench_results.json
+if [ $? -ne 0 ]; then
+    echo "benchmarks failed"
+    exit
+fi
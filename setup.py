@@ -101,7 +101,7 @@ setup(
 
     entry_points={
         'console_scripts': [
-            'alignak_counters = alignak_counters.cfg_to_backend:main',
+            'alignak_backend_counters = alignak_counters.alignak_backend_counters:main',
         ],
     },
 